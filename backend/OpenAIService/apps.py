@@ -6,7 +6,9 @@ class OpenAIConfig(AppConfig):
     name = 'OpenAIService'
 
     def ready(self) -> None:
+        from OpenAIService.prompt_template_cache import PromptTemplateCache
         from OpenAIService.repositories import ValidLLMConfigs,ValidPromptTemplates
+        PromptTemplateCache.connect_signals()
         if not settings.DISABLE_PROMPT_VALIDATIONS:
             ValidPromptTemplates().check_prompts_in_db()
             ValidLLMConfigs.check_llm_configs_in_db()
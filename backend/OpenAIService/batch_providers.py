@@ -0,0 +1,233 @@
+import abc
+import json
+import logging
+import os
+import tempfile
+import typing
+import uuid
+
+import litellm
+from pydantic import BaseModel
+
+from OpenAIService.llm_classes.LLMConfig import GLOBAL_LOADED_LLM_CONFIGS
+from OpenAIService.openai_service import OpenAIService
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+
+class BatchStatus:
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class BatchRequest:
+    """A rendered prompt to be sent in a batch, custom_id identifies its result."""
+
+    def __init__(
+        self,
+        *,
+        custom_id: str,
+        messages: typing.List[typing.Dict],
+        response_format_class: typing.Optional[typing.Type[BaseModel]] = None,
+    ):
+        self.custom_id = custom_id
+        self.messages = messages
+        self.response_format_class = response_format_class
+
+    def get_body(self, model: str, sampling_params: typing.Optional[typing.Dict] = None) -> typing.Dict:
+        """
+        Chat completion request body, in the format of the OpenAI batch input file. sampling_params of the llm
+        config are sent as in the online requests (see LLMConfig.get_request_params).
+        """
+        body = {
+            **(sampling_params or {}),
+            "model": model,
+            # Messages can have internal keys, e.g. system_generated, which the API rejects
+            "messages": [{"role": message["role"], "content": message["content"]} for message in self.messages],
+        }
+        if self.response_format_class:
+            body["response_format"] = OpenAIService.get_response_format(model, self.response_format_class)
+        return body
+
+    def get_batch_line(self, model: str, sampling_params: typing.Optional[typing.Dict] = None) -> str:
+        return json.dumps(
+            {
+                "custom_id": self.custom_id,
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": self.get_body(model, sampling_params),
+            }
+        )
+
+
+def parse_batch_output(lines: typing.Iterable[str]) -> typing.Dict[str, typing.Optional[str]]:
+    """Message content by custom_id from the lines of an OpenAI batch output file, None for failed requests"""
+    results = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        output = json.loads(line)
+        response = output.get("response") or {}
+        if output.get("error") or response.get("status_code") != 200:
+            logger.warning(f"Batch request {output.get('custom_id')} failed - {output.get('error') or response}")
+            results[output["custom_id"]] = None
+            continue
+        results[output["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+    return results
+
+
+class BatchProvider(abc.ABC):
+    """
+    Sends many requests at once for asynchronous processing, e.g. the OpenAI batch API, which is cheaper than
+    sending them one by one and doesn't use the rate limits of the online deployments.
+    """
+
+    @abc.abstractmethod
+    def submit(self, requests: typing.List[BatchRequest]) -> str:
+        """Returns the id of the batch"""
+
+    @abc.abstractmethod
+    def get_status(self, batch_id: str) -> str:
+        """Returns one of BatchStatus"""
+
+    @abc.abstractmethod
+    def get_results(self, batch_id: str) -> typing.Dict[str, typing.Optional[str]]:
+        """Returns the response content by custom_id of a completed batch, None for the requests which failed"""
+
+
+class LiteLLMBatchProvider(BatchProvider):
+    """Batch API of the provider of an OpenAI or Azure OpenAI llm config, through litellm."""
+
+    SUPPORTED_PROVIDERS = ("openai", "azure")
+    FAILED_STATUSES = ("failed", "expired", "cancelled", "cancelling")
+
+    def __init__(self, llm_config_name: str):
+        llm_config = GLOBAL_LOADED_LLM_CONFIGS[llm_config_name]
+        config_params = llm_config.get_config_dict()
+        self.sampling_params = llm_config.sampling_params
+        self.custom_llm_provider, _, self.model = config_params["model"].partition("/")
+        if self.custom_llm_provider not in self.SUPPORTED_PROVIDERS:
+            raise ValueError(
+                f"Batch API is not supported for llm config {llm_config_name} of provider {self.custom_llm_provider}"
+            )
+        self.provider_params = {
+            key: config_params[key] for key in ("api_key", "api_base", "api_version") if key in config_params
+        }
+        self.provider_params["custom_llm_provider"] = self.custom_llm_provider
+
+    def submit(self, requests: typing.List[BatchRequest]) -> str:
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as input_file:
+            for request in requests:
+                input_file.write(request.get_batch_line(self.model, self.sampling_params) + "\n")
+        try:
+            with open(input_file.name, "rb") as batch_input:
+                uploaded_file = litellm.create_file(file=batch_input, purpose="batch", **self.provider_params)
+        finally:
+            os.remove(input_file.name)
+
+        batch = litellm.create_batch(
+            completion_window="24h",
+            endpoint=BATCH_ENDPOINT,
+            input_file_id=uploaded_file.id,
+            **self.provider_params,
+        )
+        logger.info(f"Submitted batch {batch.id} of {len(requests)} requests")
+        return batch.id
+
+    def _retrieve(self, batch_id: str):
+        return litellm.retrieve_batch(batch_id=batch_id, **self.provider_params)
+
+    def get_status(self, batch_id: str) -> str:
+        status = self._retrieve(batch_id).status
+        if status == "completed":
+            return BatchStatus.COMPLETED
+        if status in self.FAILED_STATUSES:
+            return BatchStatus.FAILED
+        return BatchStatus.IN_PROGRESS
+
+    def get_results(self, batch_id: str) -> typing.Dict[str, typing.Optional[str]]:
+        batch = self._retrieve(batch_id)
+        results = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                content = litellm.file_content(file_id=file_id, **self.provider_params)
+                results.update(parse_batch_output(content.text.splitlines()))
+        return results
+
+
+class LocalFileBatchProvider(BatchProvider):
+    """
+    Stand-in batch provider keeping batches as files in a directory, for tests and for providers without a batch
+    API. Request bodies have the model and sampling params of the llm config. Requests are processed by the
+    responder (a function of the request body, returning the response content) when the status of the batch is
+    first checked, and outputs are written in the OpenAI batch format.
+    """
+
+    def __init__(self, directory: str, llm_config_name: str, responder: typing.Callable[[typing.Dict], str]):
+        self.directory = directory
+        llm_config = GLOBAL_LOADED_LLM_CONFIGS[llm_config_name]
+        self.model = llm_config.get_config_dict()["model"]
+        self.sampling_params = llm_config.sampling_params
+        self.responder = responder
+        os.makedirs(directory, exist_ok=True)
+
+    def _get_path(self, batch_id: str, kind: str) -> str:
+        return os.path.join(self.directory, f"{batch_id}.{kind}.jsonl")
+
+    def submit(self, requests: typing.List[BatchRequest]) -> str:
+        batch_id = f"local-batch-{uuid.uuid4()}"
+        with open(self._get_path(batch_id, "input"), "w") as input_file:
+            for request in requests:
+                input_file.write(request.get_batch_line(self.model, self.sampling_params) + "\n")
+        return batch_id
+
+    def _process(self, batch_id: str):
+        output_lines = []
+        with open(self._get_path(batch_id, "input")) as input_file:
+            for line in input_file:
+                request = json.loads(line)
+                try:
+                    content = self.responder(request["body"])
+                    output = {
+                        "custom_id": request["custom_id"],
+                        "response": {
+                            "status_code": 200,
+                            "body": {"choices": [{"message": {"role": "assistant", "content": content}}]},
+                        },
+                        "error": None,
+                    }
+                except Exception as e:
+                    logger.exception(f"Local batch request {request['custom_id']} failed - {e}")
+                    output = {"custom_id": request["custom_id"], "response": None, "error": {"message": str(e)}}
+                output_lines.append(json.dumps(output))
+
+        output_path = self._get_path(batch_id, "output")
+        with open(f"{output_path}.tmp", "w") as output_file:
+            output_file.write("\n".join(output_lines) + "\n")
+        os.replace(f"{output_path}.tmp", output_path)
+
+    def get_status(self, batch_id: str) -> str:
+        if not os.path.exists(self._get_path(batch_id, "input")):
+            return BatchStatus.FAILED
+        if not os.path.exists(self._get_path(batch_id, "output")):
+            self._process(batch_id)
+        return BatchStatus.COMPLETED
+
+    def get_results(self, batch_id: str) -> typing.Dict[str, typing.Optional[str]]:
+        with open(self._get_path(batch_id, "output")) as output_file:
+            return parse_batch_output(output_file)
+
+
+def get_llm_config_responder(llm_config_name: str) -> typing.Callable[[typing.Dict], str]:
+    """Responder for LocalFileBatchProvider sending every request to the llm config, one by one."""
+    config_params = GLOBAL_LOADED_LLM_CONFIGS[llm_config_name].get_request_params()
+
+    def respond(body: typing.Dict) -> str:
+        # The body has the model and sampling params of a config, the config adds the provider params
+        response = litellm.completion(**{**config_params, **body})
+        return response["choices"][0]["message"]["content"]
+
+    return respond
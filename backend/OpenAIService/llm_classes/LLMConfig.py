@@ -6,8 +6,23 @@ from django.conf import settings
 
 
 class LLMConfig:
-    def __init__(self, name: str, tools_enabled: bool = False):
+    def __init__(
+        self,
+        name: str,
+        tools_enabled: bool = False,
+        weight: float = 1,
+        requests_per_minute: int | None = None,
+        tokens_per_minute: int | None = None,
+        sampling_params: dict | None = None,
+    ):
         self.name = name
+        # Relative share of requests routed to this config by LLMRouter
+        self.weight = weight
+        # Quota of the deployment, enforced across workers by LLMRateLimiter. None means no limit.
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        # Completion params sent with every request, e.g. temperature and seed
+        self.sampling_params = dict(sampling_params or {})
 
     @classmethod
     def load_configs(cls, directory=settings.LLM_CONFIGS_PATH):
@@ -47,10 +62,26 @@ class LLMConfig:
     def get_config_dict(self):
         raise NotImplementedError
 
+    def get_request_params(self) -> dict:
+        """litellm completion params of the config, the provider params along with the sampling params."""
+        return {**self.get_config_dict(), **self.sampling_params}
+
+    @property
+    def is_deterministic(self) -> bool:
+        """Whether the config pins temperature to 0, only such configs' responses are served from the cache."""
+        return self.sampling_params.get("temperature") == 0
+
 
 class AzureOpenAILLMConfig(LLMConfig):
     def __init__(self, **kwargs):
-        super().__init__(kwargs.get("name"), tools_enabled=kwargs.get("tools_enabled"))
+        super().__init__(
+            kwargs.get("name"),
+            tools_enabled=kwargs.get("tools_enabled"),
+            weight=kwargs.get("weight", 1),
+            requests_per_minute=kwargs.get("requests_per_minute"),
+            tokens_per_minute=kwargs.get("tokens_per_minute"),
+            sampling_params=kwargs.get("sampling_params"),
+        )
         errors = []
         required_params = {
             "endpoint": str,
@@ -81,7 +112,12 @@ class AzureOpenAILLMConfig(LLMConfig):
 class GeminiConfig(LLMConfig):
     def __init__(self, **kwargs):
         super().__init__(
-            kwargs.get("name"), tools_enabled=kwargs.get("tools_enabled", False)
+            kwargs.get("name"),
+            tools_enabled=kwargs.get("tools_enabled", False),
+            weight=kwargs.get("weight", 1),
+            requests_per_minute=kwargs.get("requests_per_minute"),
+            tokens_per_minute=kwargs.get("tokens_per_minute"),
+            sampling_params=kwargs.get("sampling_params"),
         )
         errors = []
         required_params = {"model_name": str, "api_key": str, "endpoint": str}
@@ -106,7 +142,12 @@ class GeminiConfig(LLMConfig):
 class AnthropicConfig(LLMConfig):
     def __init__(self, **kwargs):
         super().__init__(
-            kwargs.get("name"), tools_enabled=kwargs.get("tools_enabled", False)
+            kwargs.get("name"),
+            tools_enabled=kwargs.get("tools_enabled", False),
+            weight=kwargs.get("weight", 1),
+            requests_per_minute=kwargs.get("requests_per_minute"),
+            tokens_per_minute=kwargs.get("tokens_per_minute"),
+            sampling_params=kwargs.get("sampling_params"),
         )
         errors = []
         required_params = {"model_name": str, "api_key": str}
@@ -130,7 +171,12 @@ class AnthropicConfig(LLMConfig):
 class GroqConfig(LLMConfig):
     def __init__(self, **kwargs):
         super().__init__(
-            kwargs.get("name"), tools_enabled=kwargs.get("tools_enabled", False)
+            kwargs.get("name"),
+            tools_enabled=kwargs.get("tools_enabled", False),
+            weight=kwargs.get("weight", 1),
+            requests_per_minute=kwargs.get("requests_per_minute"),
+            tokens_per_minute=kwargs.get("tokens_per_minute"),
+            sampling_params=kwargs.get("sampling_params"),
         )
         errors = []
         required_params = {"model_name": str, "api_key": str}
@@ -154,7 +200,12 @@ class GroqConfig(LLMConfig):
 class OpenAIAssistantConfig(LLMConfig):
     def __init__(self, **kwargs):
         super().__init__(
-            kwargs.get("name"), tools_enabled=kwargs.get("tools_enabled", False)
+            kwargs.get("name"),
+            tools_enabled=kwargs.get("tools_enabled", False),
+            weight=kwargs.get("weight", 1),
+            requests_per_minute=kwargs.get("requests_per_minute"),
+            tokens_per_minute=kwargs.get("tokens_per_minute"),
+            sampling_params=kwargs.get("sampling_params"),
         )
         errors = []
         required_params = {"model_name": str, "api_key": str}
@@ -0,0 +1,117 @@
+import logging
+import random
+import time
+import typing
+
+from django.conf import settings
+from django.core.cache import cache
+
+from OpenAIService.llm_classes.LLMConfig import GLOBAL_LOADED_LLM_CONFIGS
+
+logger = logging.getLogger(__name__)
+
+
+class LLMRouter:
+    """
+    Picks the llm config to send a request to, from the configs of a prompt.
+
+    Latency (EWMA), error and rate limit counts of every config are kept in CACHES['default'], shared by all
+    workers. A config is skipped while its circuit breaker is open, which happens for
+    LLM_ROUTER_RATE_LIMIT_COOLDOWN seconds after a rate limit error, and for LLM_ROUTER_CIRCUIT_BREAKER_COOLDOWN
+    seconds after LLM_ROUTER_FAILURE_THRESHOLD consecutive errors. Among the rest, a config is picked at random
+    with probability proportional to its weight (optional `weight` in the config yaml) divided by its latency, so
+    faster deployments get more traffic without all traffic herding onto one of them.
+
+    Stats are updated with read-modify-write without locking, so concurrent updates can be lost, which is fine
+    for routing.
+    """
+
+    STATS_KEY_PREFIX = "llm_router:stats:"
+
+    @classmethod
+    def _get_stats_key(cls, config_name: str) -> str:
+        return f"{cls.STATS_KEY_PREFIX}{config_name}"
+
+    @classmethod
+    def get_stats(cls, config_names: typing.Iterable[str]) -> typing.Dict[str, typing.Dict]:
+        config_names = list(config_names)
+        try:
+            stats = cache.get_many([cls._get_stats_key(config_name) for config_name in config_names])
+        except Exception as e:
+            logger.warning(f"Error reading llm router stats - {e}")
+            stats = {}
+        return {
+            config_name: stats.get(cls._get_stats_key(config_name)) or {} for config_name in config_names
+        }
+
+    @classmethod
+    def _set_stats(cls, config_name: str, stats: typing.Dict):
+        try:
+            cache.set(cls._get_stats_key(config_name), stats, timeout=settings.LLM_ROUTER_STATS_TTL)
+        except Exception as e:
+            logger.warning(f"Error writing llm router stats of {config_name} - {e}")
+
+    @staticmethod
+    def is_available(stats: typing.Dict, now: float) -> bool:
+        return stats.get("circuit_open_until", 0) <= now
+
+    @classmethod
+    def select(cls, config_names: typing.Sequence[str]) -> str:
+        """
+        Returns one of config_names. If the circuit breakers of all of them are open, the one closing first is
+        returned, since failing the request without trying would be worse.
+        """
+        stats_by_config = cls.get_stats(config_names)
+        now = time.time()
+        available = [
+            config_name for config_name in config_names if cls.is_available(stats_by_config[config_name], now)
+        ]
+        if not available:
+            config_name = min(config_names, key=lambda name: stats_by_config[name]["circuit_open_until"])
+            logger.warning(f"Circuit breakers of all llm configs {list(config_names)} are open, using {config_name}")
+            return config_name
+
+        latencies = [
+            stats_by_config[config_name]["latency_ewma"]
+            for config_name in available
+            if stats_by_config[config_name].get("latency_ewma")
+        ]
+        # Configs without latency data yet are treated as average, so they get tried
+        default_latency = sum(latencies) / len(latencies) if latencies else 1.0
+        scores = [
+            getattr(GLOBAL_LOADED_LLM_CONFIGS[config_name], "weight", 1)
+            / max(stats_by_config[config_name].get("latency_ewma") or default_latency, 0.001)
+            for config_name in available
+        ]
+        if sum(scores) <= 0:
+            return random.choice(available)
+        return random.choices(available, weights=scores)[0]
+
+    @classmethod
+    def record_success(cls, config_name: str, latency: float):
+        stats = cls.get_stats([config_name])[config_name]
+        alpha = settings.LLM_ROUTER_LATENCY_EWMA_ALPHA
+        previous_latency = stats.get("latency_ewma")
+        stats["latency_ewma"] = (
+            latency if previous_latency is None else alpha * latency + (1 - alpha) * previous_latency
+        )
+        stats["requests"] = stats.get("requests", 0) + 1
+        stats["consecutive_failures"] = 0
+        cls._set_stats(config_name, stats)
+
+    @classmethod
+    def record_error(cls, config_name: str, rate_limited: bool = False):
+        stats = cls.get_stats([config_name])[config_name]
+        stats["requests"] = stats.get("requests", 0) + 1
+        stats["errors"] = stats.get("errors", 0) + 1
+        stats["consecutive_failures"] = stats.get("consecutive_failures", 0) + 1
+        if rate_limited:
+            stats["rate_limits"] = stats.get("rate_limits", 0) + 1
+            stats["circuit_open_until"] = time.time() + settings.LLM_ROUTER_RATE_LIMIT_COOLDOWN
+            logger.info(f"LLM config {config_name} is rate limited, skipping it for a while")
+        elif stats["consecutive_failures"] >= settings.LLM_ROUTER_FAILURE_THRESHOLD:
+            stats["circuit_open_until"] = time.time() + settings.LLM_ROUTER_CIRCUIT_BREAKER_COOLDOWN
+            logger.warning(
+                f"LLM config {config_name} failed {stats['consecutive_failures']} times in a row, skipping it for a while"
+            )
+        cls._set_stats(config_name, stats)
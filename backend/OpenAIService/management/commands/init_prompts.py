@@ -93,6 +93,29 @@ User's Answer: {{user_answer}}
 Evaluate the coherence of this answer.""",
                 "required_kwargs": ["question", "user_answer"],
             },
+            ValidPromptTemplates.GRAMMAR_COHERENCE_PROCESSOR: {
+                "system_prompt": """You are an expert English evaluator. Your task is to evaluate both the grammar and the coherence of an answer to a question.
+
+Grammar: identify the grammatical errors in the answer. For each error you find, provide:
+1. The incorrect text
+2. The correct version
+3. The type of grammatical error (e.g., Subject-Verb Agreement, Tense Error, Article Usage, etc.)
+4. A brief reason explaining why it's incorrect
+Be thorough but fair in your evaluation. Focus on significant errors that affect clarity and correctness.
+
+Coherence: assess how well the answer addresses the question, how complete it is, and how logically structured it is.
+1. Completeness: Does the answer fully address all parts of the question? (yes/no)
+2. Relevance: How relevant is the answer to the question? (high/medium/low)
+3. Logical: How logical and well-structured is the flow of ideas? (high/medium/low)
+4. Overall: Overall coherence assessment (high/medium/low)
+For each aspect, provide a reason explaining your evaluation.""",
+                "user_prompt": """Question: {{question}}
+
+User's Answer: {{user_answer}}
+
+Return the grammar errors and the coherence evaluation of this answer.""",
+                "required_kwargs": ["question", "user_answer"],
+            },
         }
 
         for prompt_name in valid_prompts:
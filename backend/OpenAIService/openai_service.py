@@ -5,9 +5,15 @@ from openai.types.beta.assistant import Assistant
 from openai.types.beta.thread import Thread
 from openai.types.beta.threads.run import Run
 import logging
+import copy
+import functools
 import litellm
+from litellm.utils import type_to_response_format_param
+from asgiref.sync import sync_to_async
 from pydantic import BaseModel
 
+from OpenAIService.rate_limiter import LLMRateLimiter
+
 
 class OpenAIService:
     @staticmethod
@@ -37,17 +43,14 @@ class OpenAIService:
         return model_name and ("gemini" in model_name.lower() or "vertex" in model_name.lower())
 
     @staticmethod
-    def send_messages_and_get_response(
-        messages: list,
-        llm_config_params: dict,
-        response_format_class: type[BaseModel] | None = None,
-    ):
-        # Check if we're using a Gemini model
-        model_name = llm_config_params.get("model", "")
-        is_gemini = OpenAIService._is_gemini_model(model_name)
-
+    @functools.lru_cache(maxsize=None)
+    def _build_response_format(response_format_class: type[BaseModel], is_gemini: bool) -> dict:
+        """
+        response_format payload of the class, built once per class and provider kind, since generating and
+        cleaning the schema on every request is wasted work.
+        """
         # For Gemini models with structured output, we need to clean the schema
-        if is_gemini and response_format_class:
+        if is_gemini:
             # Get the JSON schema from the Pydantic model
             schema = response_format_class.model_json_schema()
 
@@ -55,24 +58,162 @@ class OpenAIService:
             cleaned_schema = OpenAIService._clean_schema_for_gemini(schema)
 
             # Pass the cleaned schema directly
+            return {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": response_format_class.__name__,
+                    "schema": cleaned_schema,
+                    "strict": False
+                }
+            }
+        # For non-Gemini models, the payload litellm would build from the class
+        return type_to_response_format_param(response_format_class)
+
+    @staticmethod
+    def get_response_format(model_name: str, response_format_class: type[BaseModel] | None):
+        if response_format_class is None:
+            return None
+        # Copied, since the payload is shared by all requests and litellm may modify it
+        return copy.deepcopy(
+            OpenAIService._build_response_format(
+                response_format_class, bool(OpenAIService._is_gemini_model(model_name))
+            )
+        )
+
+    @staticmethod
+    def get_used_tokens(response):
+        usage = getattr(response, "usage", None)
+        return getattr(usage, "total_tokens", None)
+
+    @staticmethod
+    def send_messages(
+        messages: list,
+        llm_config_params: dict,
+        response_format_class: type[BaseModel] | None = None,
+        llm_config_name: str | None = None,
+    ):
+        """
+        Returns the whole litellm response, including usage.
+        If llm_config_name is passed, the request waits for quota of the config's rate limits (see LLMRateLimiter).
+        The tokens reserved for a request which fails are given back.
+        """
+        if llm_config_name:
+            estimated_tokens = LLMRateLimiter.estimate_tokens(messages)
+            LLMRateLimiter.acquire(llm_config_name, estimated_tokens)
+
+        try:
             response = litellm.completion(
                 **llm_config_params,
                 messages=messages,
-                response_format={
-                    "type": "json_schema",
-                    "json_schema": {
-                        "name": response_format_class.__name__,
-                        "schema": cleaned_schema,
-                        "strict": False
-                    }
-                }
+                response_format=OpenAIService.get_response_format(
+                    llm_config_params.get("model", ""), response_format_class
+                ),
+            )
+        except Exception:
+            if llm_config_name:
+                LLMRateLimiter.record_usage(llm_config_name, estimated_tokens, 0)
+            raise
+
+        if llm_config_name:
+            LLMRateLimiter.record_usage(
+                llm_config_name, estimated_tokens, OpenAIService.get_used_tokens(response)
             )
-        else:
-            # For non-Gemini models, use the standard approach
+        return response
+
+    @staticmethod
+    def send_messages_and_get_response(
+        messages: list,
+        llm_config_params: dict,
+        response_format_class: type[BaseModel] | None = None,
+        llm_config_name: str | None = None,
+    ):
+        return OpenAIService.send_messages(
+            messages, llm_config_params, response_format_class, llm_config_name
+        )["choices"][0]
+
+    @staticmethod
+    def stream_messages_and_get_response(
+        messages: list,
+        llm_config_params: dict,
+        response_format_class: type[BaseModel] | None = None,
+        llm_config_name: str | None = None,
+    ):
+        """
+        Streaming version of send_messages_and_get_response, yields the message content as it arrives and returns
+        the usage of the request, sent by the provider with the last chunk.
+        """
+        if llm_config_name:
+            estimated_tokens = LLMRateLimiter.estimate_tokens(messages)
+            LLMRateLimiter.acquire(llm_config_name, estimated_tokens)
+
+        usage = None
+        try:
             response = litellm.completion(
                 **llm_config_params,
                 messages=messages,
-                response_format=response_format_class,
+                response_format=OpenAIService.get_response_format(
+                    llm_config_params.get("model", ""), response_format_class
+                ),
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            for chunk in response:
+                usage = getattr(chunk, "usage", None) or usage
+                if not chunk.choices:
+                    continue
+                content = chunk.choices[0].delta.content
+                if content:
+                    yield content
+        except Exception:
+            if llm_config_name:
+                LLMRateLimiter.record_usage(llm_config_name, estimated_tokens, 0)
+            raise
+
+        if llm_config_name:
+            LLMRateLimiter.record_usage(llm_config_name, estimated_tokens, getattr(usage, "total_tokens", None))
+        return usage
+
+    @staticmethod
+    async def asend_messages(
+        messages: list,
+        llm_config_params: dict,
+        response_format_class: type[BaseModel] | None = None,
+        llm_config_name: str | None = None,
+    ):
+        """Async version of send_messages, the worker isn't blocked while waiting for the LLM."""
+        if llm_config_name:
+            estimated_tokens = LLMRateLimiter.estimate_tokens(messages)
+            await LLMRateLimiter.aacquire(llm_config_name, estimated_tokens)
+
+        try:
+            response = await litellm.acompletion(
+                **llm_config_params,
+                messages=messages,
+                response_format=OpenAIService.get_response_format(
+                    llm_config_params.get("model", ""), response_format_class
+                ),
             )
+        except Exception:
+            if llm_config_name:
+                await sync_to_async(LLMRateLimiter.record_usage, thread_sensitive=False)(
+                    llm_config_name, estimated_tokens, 0
+                )
+            raise
 
+        if llm_config_name:
+            await sync_to_async(LLMRateLimiter.record_usage, thread_sensitive=False)(
+                llm_config_name, estimated_tokens, OpenAIService.get_used_tokens(response)
+            )
+        return response
+
+    @staticmethod
+    async def asend_messages_and_get_response(
+        messages: list,
+        llm_config_params: dict,
+        response_format_class: type[BaseModel] | None = None,
+        llm_config_name: str | None = None,
+    ):
+        response = await OpenAIService.asend_messages(
+            messages, llm_config_params, response_format_class, llm_config_name
+        )
         return response["choices"][0]
@@ -0,0 +1,133 @@
+import json
+import logging
+import threading
+import time
+import typing
+from string import Template
+
+from django.conf import settings
+from django.core.cache import cache
+
+from common.caching import get_content_hash
+from OpenAIService.models import PromptTemplate
+
+logger = logging.getLogger(__name__)
+
+VERSION_CACHE_KEY = "prompt_template_cache:version"
+
+
+class CompiledPromptTemplate:
+    """
+    A PromptTemplate with its templates parsed and its llm config names resolved, so rendering needs no DB access.
+    version is a hash of the template contents.
+    """
+
+    def __init__(self, prompt_template: PromptTemplate, llm_config_names: typing.List[str]):
+        self.name = prompt_template.name
+        self.llm_config_names = tuple(llm_config_names)
+        self.system_prompt_template = Template(prompt_template.system_prompt_template)
+        self.initial_messages_templates = [
+            (msg["role"], Template(msg["content"])) for msg in prompt_template.initial_messages_templates
+        ]
+        self.version = get_content_hash(
+            prompt_template.system_prompt_template,
+            json.dumps(prompt_template.initial_messages_templates, sort_keys=True),
+            prompt_template.user_prompt_template,
+        )
+
+    def get_init_msg_list(self, initializing_context_vars=None):
+        if initializing_context_vars is None:
+            initializing_context_vars = {}
+        init_msg_list = [
+            {"role": "system", "content": self.system_prompt_template.substitute(initializing_context_vars)}
+        ]
+        for role, content_template in self.initial_messages_templates:
+            init_msg_list.append(
+                {
+                    "content": content_template.substitute(initializing_context_vars),
+                    "role": role,
+                    "system_generated": True,
+                    "show_in_user_history": False,
+                }
+            )
+        return init_msg_list
+
+
+class PromptTemplateCache:
+    """
+    Process-local cache of CompiledPromptTemplate by prompt name.
+
+    Saving or deleting a PromptTemplate, or changing its llm configs, clears the cache of the process doing it and
+    increments a version counter in CACHES['default'] (see connect_signals). Other processes compare the counter
+    with the one their entries were loaded at, at most once every PROMPT_TEMPLATE_CACHE_VERSION_CHECK_INTERVAL
+    seconds, and drop their entries when it changed.
+    """
+
+    _templates: typing.Dict[str, CompiledPromptTemplate] = {}
+    _lock = threading.Lock()
+    _version = None
+    _version_checked_at = 0.0
+
+    @staticmethod
+    def _get_shared_version():
+        try:
+            return cache.get(VERSION_CACHE_KEY, 0)
+        except Exception as e:
+            logger.warning(f"Error reading prompt template cache version - {e}")
+            return None
+
+    @classmethod
+    def _check_version(cls):
+        now = time.monotonic()
+        if now - cls._version_checked_at < settings.PROMPT_TEMPLATE_CACHE_VERSION_CHECK_INTERVAL:
+            return
+        shared_version = cls._get_shared_version()
+        with cls._lock:
+            cls._version_checked_at = now
+            # If redis can't be read, entries are dropped, since changes could have been missed
+            if shared_version is None or shared_version != cls._version:
+                cls._templates = {}
+                cls._version = shared_version
+
+    @classmethod
+    def get(cls, prompt_name: str) -> CompiledPromptTemplate:
+        """Raises PromptTemplate.DoesNotExist like PromptTemplate.objects.get"""
+        if not settings.PROMPT_TEMPLATE_CACHE_ENABLED:
+            return cls._load(prompt_name)
+
+        cls._check_version()
+        compiled = cls._templates.get(prompt_name)
+        if compiled is None:
+            compiled = cls._load(prompt_name)
+            with cls._lock:
+                cls._templates[prompt_name] = compiled
+        return compiled
+
+    @staticmethod
+    def _load(prompt_name: str) -> CompiledPromptTemplate:
+        prompt_template = PromptTemplate.objects.prefetch_related("llm_config_names").get(name=prompt_name)
+        return CompiledPromptTemplate(
+            prompt_template, [config.name for config in prompt_template.llm_config_names.all()]
+        )
+
+    @classmethod
+    def invalidate(cls, **kwargs):
+        with cls._lock:
+            cls._templates = {}
+        try:
+            cache.add(VERSION_CACHE_KEY, 0, timeout=None)
+            cache.incr(VERSION_CACHE_KEY)
+        except Exception as e:
+            logger.warning(f"Error incrementing prompt template cache version - {e}")
+
+    @classmethod
+    def connect_signals(cls):
+        from django.db.models.signals import m2m_changed, post_delete, post_save
+
+        post_save.connect(cls.invalidate, sender=PromptTemplate, dispatch_uid="prompt_template_cache_save")
+        post_delete.connect(cls.invalidate, sender=PromptTemplate, dispatch_uid="prompt_template_cache_delete")
+        m2m_changed.connect(
+            cls.invalidate,
+            sender=PromptTemplate.llm_config_names.through,
+            dispatch_uid="prompt_template_cache_llm_configs",
+        )
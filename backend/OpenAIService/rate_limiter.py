@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import time
+import typing
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from OpenAIService.llm_classes.LLMConfig import GLOBAL_LOADED_LLM_CONFIGS
+
+logger = logging.getLogger(__name__)
+
+# Token buckets refilled continuously at capacity per minute. KEYS are the bucket keys, ARGV is the force flag
+# followed by (capacity, amount requested) for every key. If every bucket has enough tokens, or force is set, the
+# amounts are taken from all of them and 0 is returned, else nothing is taken and the seconds until there would
+# be enough are returned. Redis time is used, so the clocks of the workers don't matter.
+TOKEN_BUCKET_SCRIPT = """
+local redis_time = redis.call("TIME")
+local now = tonumber(redis_time[1]) + tonumber(redis_time[2]) / 1000000
+local force = ARGV[1] == "1"
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local requested = math.min(tonumber(ARGV[i * 2 + 1]), capacity)
+    local rate = capacity / 60
+    local bucket = redis.call("HMGET", key, "level", "updated_at")
+    local level = tonumber(bucket[1]) or capacity
+    local updated_at = tonumber(bucket[2]) or now
+    level = math.min(capacity, level + math.max(0, now - updated_at) * rate)
+    levels[i] = level - requested
+    if level < requested then
+        wait = math.max(wait, (requested - level) / rate)
+    end
+end
+if wait > 0 and not force then
+    return tostring(wait)
+end
+for i, key in ipairs(KEYS) do
+    redis.call("HSET", key, "level", tostring(levels[i]), "updated_at", tostring(now))
+    redis.call("EXPIRE", key, 120)
+end
+return "0"
+"""
+
+
+class LLMRateLimiter:
+    """
+    Token buckets in redis, shared by all workers, for the requests_per_minute and tokens_per_minute quotas set in
+    the llm config yamls. Senders wait locally for their turn instead of being throttled by the provider and
+    retrying with backoff. Waits longer than LLM_RATE_LIMIT_MAX_WAIT seconds aren't done, the request is sent
+    anyway and the provider decides. If redis fails, requests aren't limited.
+
+    Tokens are reserved with an estimate (LLMRateLimiter.estimate_tokens) and corrected with the actual usage
+    after the response, or given back if the request fails (LLMRateLimiter.record_usage).
+    """
+
+    KEY_PREFIX = "llm_rate_limit"
+    _script = None
+
+    @classmethod
+    def _get_script(cls):
+        if cls._script is None:
+            from django_redis import get_redis_connection
+
+            cls._script = get_redis_connection("default").register_script(TOKEN_BUCKET_SCRIPT)
+        return cls._script
+
+    @classmethod
+    def _get_buckets(cls, llm_config_name: str, tokens: int) -> typing.List[typing.Tuple[str, int, int]]:
+        """(key, capacity, amount) of the buckets of the config"""
+        llm_config = GLOBAL_LOADED_LLM_CONFIGS[llm_config_name]
+        buckets = []
+        if llm_config.requests_per_minute:
+            buckets.append(
+                (f"{cls.KEY_PREFIX}:{llm_config_name}:requests", llm_config.requests_per_minute, 1)
+            )
+        if llm_config.tokens_per_minute:
+            buckets.append(
+                (f"{cls.KEY_PREFIX}:{llm_config_name}:tokens", llm_config.tokens_per_minute, tokens)
+            )
+        return buckets
+
+    @classmethod
+    def _take(cls, buckets, force=False) -> float:
+        """Returns seconds to wait before the amounts are available, 0 if they were taken"""
+        args = ["1" if force else "0"]
+        for _, capacity, amount in buckets:
+            args.extend([capacity, amount])
+        try:
+            return float(cls._get_script()(keys=[key for key, _, _ in buckets], args=args))
+        except Exception as e:
+            logger.warning(f"Error in LLM rate limiter, not limiting - {e}")
+            return 0
+
+    @staticmethod
+    def estimate_tokens(messages: typing.List[typing.Dict]) -> int:
+        """Rough token count of a request, about 4 characters per token, plus the expected completion size."""
+        prompt_characters = sum(len(str(message.get("content") or "")) for message in messages)
+        return prompt_characters // 4 + settings.LLM_RATE_LIMIT_COMPLETION_TOKENS_ESTIMATE
+
+    @classmethod
+    def _get_wait(cls, buckets, waited: float) -> float:
+        wait = cls._take(buckets)
+        if wait and waited + wait > settings.LLM_RATE_LIMIT_MAX_WAIT:
+            logger.warning("LLM rate limit wait exceeds LLM_RATE_LIMIT_MAX_WAIT, sending without waiting")
+            cls._take(buckets, force=True)
+            return 0
+        return wait
+
+    @classmethod
+    def acquire(cls, llm_config_name: str, tokens: int) -> float:
+        """Blocks until the config has quota for a request of the given tokens, returns the seconds waited."""
+        if not settings.LLM_RATE_LIMIT_ENABLED:
+            return 0
+        buckets = cls._get_buckets(llm_config_name, tokens)
+        if not buckets:
+            return 0
+        waited = 0
+        while wait := cls._get_wait(buckets, waited):
+            time.sleep(wait)
+            waited += wait
+        if waited:
+            logger.info(f"Waited {waited:.2f}s for LLM rate limit of {llm_config_name}")
+        return waited
+
+    @classmethod
+    async def aacquire(cls, llm_config_name: str, tokens: int) -> float:
+        """Async version of acquire, waiting doesn't block the event loop."""
+        if not settings.LLM_RATE_LIMIT_ENABLED:
+            return 0
+        buckets = cls._get_buckets(llm_config_name, tokens)
+        if not buckets:
+            return 0
+        waited = 0
+        while wait := await sync_to_async(cls._get_wait, thread_sensitive=False)(buckets, waited):
+            await asyncio.sleep(wait)
+            waited += wait
+        if waited:
+            logger.info(f"Waited {waited:.2f}s for LLM rate limit of {llm_config_name}")
+        return waited
+
+    @classmethod
+    def record_usage(cls, llm_config_name: str, estimated_tokens: int, used_tokens: typing.Optional[int]):
+        """Corrects the tokens bucket by the difference between the reserved estimate and the actual usage."""
+        if not settings.LLM_RATE_LIMIT_ENABLED or used_tokens is None or used_tokens == estimated_tokens:
+            return
+        llm_config = GLOBAL_LOADED_LLM_CONFIGS[llm_config_name]
+        if not llm_config.tokens_per_minute:
+            return
+        cls._take(
+            [
+                (
+                    f"{cls.KEY_PREFIX}:{llm_config_name}:tokens",
+                    llm_config.tokens_per_minute,
+                    used_tokens - estimated_tokens,
+                )
+            ],
+            force=True,
+        )
@@ -1,13 +1,18 @@
-import random
 import logging
+import time
 import openai
+from asgiref.sync import sync_to_async
 from OpenAIService.llm_classes.LLMConfig import GLOBAL_LOADED_LLM_CONFIGS, LLMConfig
 from OpenAIService.models import (
     LLMConfigName,
     PromptTemplate,
 )
 from string import Template
+from OpenAIService.llm_router import LLMRouter
 from OpenAIService.openai_service import OpenAIService
+from OpenAIService.prompt_template_cache import PromptTemplateCache
+from OpenAIService.response_cache import LLMResponseCache
+from OpenAIService.usage import record_llm_usage
 from django.conf import settings
 
 
@@ -45,12 +50,29 @@ class ValidLLMConfigs:
 class ValidPromptTemplates:
     GRAMMAR_PROCESSOR = "grammar_processor"
     COHERENCE_PROCESSOR = "coherence_processor"
+    GRAMMAR_COHERENCE_PROCESSOR = "grammar_coherence_processor"
+
+    # Prompts used only by opt-in dags, by the dag using them. They are required in the DB only when that dag is
+    # the WRITING_EVENTFLOW_TYPE.
+    OPT_IN_PROMPT_EVENTFLOW_TYPES = {
+        GRAMMAR_COHERENCE_PROCESSOR: "writing_combined",
+    }
 
     @classmethod
     def get_all_valid_prompts(cls) -> list:
         return [
             cls.GRAMMAR_PROCESSOR,
             cls.COHERENCE_PROCESSOR,
+            cls.GRAMMAR_COHERENCE_PROCESSOR,
+        ]
+
+    @classmethod
+    def get_required_prompts(cls) -> list:
+        return [
+            prompt
+            for prompt in cls.get_all_valid_prompts()
+            if cls.OPT_IN_PROMPT_EVENTFLOW_TYPES.get(prompt, settings.WRITING_EVENTFLOW_TYPE)
+            == settings.WRITING_EVENTFLOW_TYPE
         ]
 
     @classmethod
@@ -60,7 +82,7 @@ class ValidPromptTemplates:
     @classmethod
     def check_prompts_in_db(cls) -> bool:
         db_prompts = ValidPromptTemplates.get_all_prompts_from_db()
-        code_prompts = cls.get_all_valid_prompts()
+        code_prompts = cls.get_required_prompts()
         missing_prompts = [
             prompt for prompt in code_prompts if prompt not in db_prompts
         ]
@@ -109,51 +131,234 @@ class LLMCommunicationWrapper:
             )
         return init_msg_list
 
+    class LLMRequest:
+        """
+        A prompt rendered for sending, along with the llm configs it can be sent to and its response cache keys.
+        cached_response is set if the response was found in the LLM response cache.
+        """
+
+        def __init__(self, *, prompt_name, llm_config_names, messages, response_format_class):
+            self.prompt_name = prompt_name
+            self.llm_config_names = llm_config_names
+            self.messages = messages
+            self.response_format_class = response_format_class
+            self.cache_keys = {}
+            self.cached_response = None
+            self.llm_config_params, self.llm_config_name = None, None
+            self.retries = 0
+            self.started_at = time.monotonic()
+            self.select_llm_config()
+
+        def select_llm_config(self):
+            llm_config_name = LLMRouter.select(self.llm_config_names)
+            llm_config_instance: LLMConfig = GLOBAL_LOADED_LLM_CONFIGS[
+                llm_config_name
+            ]
+            self.llm_config_params = llm_config_instance.get_request_params()
+            self.llm_config_name = llm_config_name
+
+        def select_next_llm_config(self) -> bool:
+            """
+            Drops the current llm config, after it was rate limited, and selects another one.
+            Returns False if there is no other config left.
+            """
+            self.llm_config_names.remove(self.llm_config_name)
+            if not self.llm_config_names:
+                return False
+            self.retries += 1
+            self.select_llm_config()
+            return True
+
+        def record_usage(self, *, usage=None, cache_hit=False):
+            record_llm_usage(
+                prompt_name=self.prompt_name,
+                llm_config_name=None if cache_hit else self.llm_config_name,
+                model=None if cache_hit else self.llm_config_params.get("model"),
+                usage=usage,
+                latency=time.monotonic() - self.started_at,
+                cache_hit=cache_hit,
+                retries=self.retries,
+            )
+
+    @staticmethod
+    def prepare_request(
+        prompt_name,
+        response_format_class=None,
+        initializing_context_vars=None,
+        use_cache=True,
+    ) -> "LLMCommunicationWrapper.LLMRequest":
+        """Everything needed before sending a prompt which uses the DB or the cache, kept apart for the async path."""
+        prompt_template = PromptTemplateCache.get(prompt_name)
+
+        llm_config_names = list(prompt_template.llm_config_names)
+        if len(llm_config_names) == 0:
+            raise LLMCommunicationWrapper.LLMConfigsNotAvailable()
+
+        request = LLMCommunicationWrapper.LLMRequest(
+            prompt_name=prompt_name,
+            llm_config_names=llm_config_names,
+            messages=prompt_template.get_init_msg_list(initializing_context_vars),
+            response_format_class=response_format_class,
+        )
+
+        if use_cache and LLMResponseCache.is_enabled():
+            # A response from any of the prompt's deterministic configs can be served, the selected one is tried first
+            for config_name in [request.llm_config_name, *llm_config_names]:
+                llm_config = GLOBAL_LOADED_LLM_CONFIGS[config_name]
+                if not llm_config.is_deterministic:
+                    continue
+                request.cache_keys[config_name] = LLMResponseCache.get_cache_key(
+                    prompt_template=prompt_template,
+                    messages=request.messages,
+                    model=llm_config.get_config_dict()["model"],
+                    sampling_params=llm_config.sampling_params,
+                    response_format_class=response_format_class,
+                )
+            if request.cache_keys:
+                request.cached_response = LLMResponseCache.get(request.cache_keys.values())
+            if request.cached_response is not None:
+                logger.info(f"Serving response for prompt {prompt_name} from LLM response cache")
+                request.record_usage(cache_hit=True)
+
+        return request
+
+    @staticmethod
+    def complete_request(request: "LLMCommunicationWrapper.LLMRequest", response_msg_content: str, usage=None) -> str:
+        request.record_usage(usage=usage)
+
+        cache_key = request.cache_keys.get(request.llm_config_name)
+        if cache_key is not None:
+            if LLMResponseCache.is_valid_response(response_msg_content, request.response_format_class):
+                LLMResponseCache.set(cache_key, response_msg_content)
+            else:
+                logger.warning(f"Not caching invalid response for prompt {request.prompt_name}")
+
+        return response_msg_content
+
     @staticmethod
     def get_response_without_chathistory(
         prompt_name,
         response_format_class=None,
         initializing_context_vars=None,
         retry_on_openai_time_limit=False,
+        use_cache=True,
     ):
-        def select_llm_config(llm_config_names):
-            random_llm_config_name = random.choice(llm_config_names)
-            llm_config_instance: LLMConfig = GLOBAL_LOADED_LLM_CONFIGS[
-                random_llm_config_name
-            ]
-            return llm_config_instance.get_config_dict(), random_llm_config_name
-
-        prompt_template = PromptTemplate.objects.get(name=prompt_name)
+        request = LLMCommunicationWrapper.prepare_request(
+            prompt_name, response_format_class, initializing_context_vars, use_cache
+        )
+        if request.cached_response is not None:
+            return request.cached_response
 
-        llm_config_names = [
-            config.name for config in prompt_template.llm_config_names.all()
-        ]
-        if len(llm_config_names) == 0:
-            raise LLMCommunicationWrapper.LLMConfigsNotAvailable()
+        while True:
+            started_at = time.monotonic()
+            try:
+                response = OpenAIService.send_messages(
+                    messages=request.messages,
+                    llm_config_params=request.llm_config_params,
+                    response_format_class=response_format_class,
+                    llm_config_name=request.llm_config_name,
+                )
+            except openai._exceptions.RateLimitError as e:
+                LLMRouter.record_error(request.llm_config_name, rate_limited=True)
+                if retry_on_openai_time_limit and request.select_next_llm_config():
+                    continue
+                raise e
+            except Exception:
+                LLMRouter.record_error(request.llm_config_name)
+                raise
+            LLMRouter.record_success(request.llm_config_name, time.monotonic() - started_at)
+            break
 
-        llm_config_params, llm_config_name = select_llm_config(llm_config_names)
+        return LLMCommunicationWrapper.complete_request(
+            request, response["choices"][0]["message"]["content"], getattr(response, "usage", None)
+        )
 
-        msg_list = LLMCommunicationWrapper.get_chat_history_init_msg_list(
-            prompt_template, initializing_context_vars
+    @staticmethod
+    def stream_response_without_chathistory(
+        prompt_name,
+        response_format_class=None,
+        initializing_context_vars=None,
+        retry_on_openai_time_limit=False,
+        use_cache=True,
+    ):
+        """
+        Streaming version of get_response_without_chathistory, yields the response content in chunks as they
+        arrive. A cached response is yielded as a single chunk. Rate limited requests are retried on another config
+        only if nothing was yielded yet.
+        """
+        request = LLMCommunicationWrapper.prepare_request(
+            prompt_name, response_format_class, initializing_context_vars, use_cache
         )
+        if request.cached_response is not None:
+            yield request.cached_response
+            return
 
         while True:
+            started_at = time.monotonic()
+            chunks = []
             try:
-                choice_response = OpenAIService.send_messages_and_get_response(
-                    messages=msg_list,
-                    llm_config_params=llm_config_params,
+                stream = OpenAIService.stream_messages_and_get_response(
+                    messages=request.messages,
+                    llm_config_params=request.llm_config_params,
                     response_format_class=response_format_class,
+                    llm_config_name=request.llm_config_name,
                 )
-                break
+                while True:
+                    try:
+                        chunk = next(stream)
+                    except StopIteration as stream_end:
+                        usage = stream_end.value
+                        break
+                    chunks.append(chunk)
+                    yield chunk
             except openai._exceptions.RateLimitError as e:
-                if retry_on_openai_time_limit:
-                    llm_config_names.remove(llm_config_name)
-                    llm_config_params, llm_config_name = select_llm_config(
-                        llm_config_names
-                    )
-                else:
-                    raise e
+                LLMRouter.record_error(request.llm_config_name, rate_limited=True)
+                if not chunks and retry_on_openai_time_limit and request.select_next_llm_config():
+                    continue
+                raise e
+            except Exception:
+                LLMRouter.record_error(request.llm_config_name)
+                raise
+            LLMRouter.record_success(request.llm_config_name, time.monotonic() - started_at)
+            break
 
-        response_msg_content = choice_response["message"]["content"]
+        LLMCommunicationWrapper.complete_request(request, "".join(chunks), usage)
 
-        return response_msg_content
+    @staticmethod
+    async def aget_response_without_chathistory(
+        prompt_name,
+        response_format_class=None,
+        initializing_context_vars=None,
+        retry_on_openai_time_limit=False,
+        use_cache=True,
+    ):
+        """Async version of get_response_without_chathistory, DB and cache access is run with sync_to_async."""
+        request = await sync_to_async(LLMCommunicationWrapper.prepare_request)(
+            prompt_name, response_format_class, initializing_context_vars, use_cache
+        )
+        if request.cached_response is not None:
+            return request.cached_response
+
+        while True:
+            started_at = time.monotonic()
+            try:
+                response = await OpenAIService.asend_messages(
+                    messages=request.messages,
+                    llm_config_params=request.llm_config_params,
+                    response_format_class=response_format_class,
+                    llm_config_name=request.llm_config_name,
+                )
+            except openai._exceptions.RateLimitError as e:
+                await sync_to_async(LLMRouter.record_error)(request.llm_config_name, rate_limited=True)
+                if retry_on_openai_time_limit and await sync_to_async(request.select_next_llm_config)():
+                    continue
+                raise e
+            except Exception:
+                await sync_to_async(LLMRouter.record_error)(request.llm_config_name)
+                raise
+            await sync_to_async(LLMRouter.record_success)(request.llm_config_name, time.monotonic() - started_at)
+            break
+
+        return await sync_to_async(LLMCommunicationWrapper.complete_request)(
+            request, response["choices"][0]["message"]["content"], getattr(response, "usage", None)
+        )
@@ -0,0 +1,92 @@
+import functools
+import json
+import logging
+import typing
+
+from django.conf import settings
+from pydantic import BaseModel, ValidationError
+
+from common.caching import TwoTierCache, get_content_hash
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=None)
+def get_schema_json(response_format_class: typing.Type[BaseModel]) -> str:
+    return json.dumps(response_format_class.model_json_schema(), sort_keys=True)
+
+
+class LLMResponseCache:
+    """
+    Cache of LLM responses, keyed by a hash of the prompt template version, the rendered messages, the model, its
+    sampling params and the response format schema. Kept in process and in CACHES['default'] (redis).
+    Only responses of deterministic llm configs (see LLMConfig.is_deterministic) are cached, and only if they parse,
+    so a truncated or invalid response isn't served again to the retries of the request.
+    """
+
+    _cache = TwoTierCache(
+        namespace="llm_response",
+        maxsize=settings.LLM_RESPONSE_CACHE_SIZE,
+        timeout=settings.LLM_RESPONSE_CACHE_TTL,
+    )
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return settings.LLM_RESPONSE_CACHE_ENABLED
+
+    @staticmethod
+    def get_cache_key(
+        *,
+        prompt_template,
+        messages: typing.List[typing.Dict],
+        model: str,
+        sampling_params: typing.Dict,
+        response_format_class: typing.Optional[typing.Type[BaseModel]],
+    ) -> str:
+        """prompt_template is a CompiledPromptTemplate, its version changes whenever the prompt is edited."""
+        response_format = get_schema_json(response_format_class) if response_format_class else ""
+        return get_content_hash(
+            prompt_template.name,
+            prompt_template.version,
+            json.dumps(messages, sort_keys=True),
+            model,
+            json.dumps(sampling_params, sort_keys=True),
+            response_format,
+        )
+
+    @classmethod
+    def get(cls, cache_keys: typing.Iterable[str]) -> typing.Optional[str]:
+        """Returns the first cached response among the given keys."""
+        cache_keys = list(cache_keys)
+        found = cls._cache.get_many(cache_keys)
+        for cache_key in cache_keys:
+            if cache_key in found:
+                return found[cache_key]
+        return None
+
+    @staticmethod
+    def is_valid_response(response: str, response_format_class: typing.Optional[typing.Type[BaseModel]]) -> bool:
+        """Whether the response parses, as json of the response format class if there is one."""
+        try:
+            if response_format_class is not None:
+                response_format_class.model_validate_json(response)
+            else:
+                json.loads(response)
+        except (ValidationError, ValueError):
+            return False
+        return True
+
+    @classmethod
+    def set(cls, cache_key: str, response: str):
+        if response is None:
+            return
+        if len(response) > settings.LLM_RESPONSE_CACHE_MAX_ENTRY_SIZE:
+            logger.info(
+                f"Not caching LLM response of size {len(response)}, larger than LLM_RESPONSE_CACHE_MAX_ENTRY_SIZE"
+            )
+            return
+        cls._cache.set(cache_key, response)
+
+    @classmethod
+    def stats(cls) -> typing.Dict[str, int]:
+        return cls._cache.stats()
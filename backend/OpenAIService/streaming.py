@@ -0,0 +1,65 @@
+import json
+import typing
+
+
+class IncrementalJSONArrayParser:
+    """
+    Parses the items of an array of objects under a top level key of a JSON object as the JSON text streams in,
+    e.g. the items of "errors" in {"errors": [{...}, {...}]}. Every item is returned by feed as soon as its
+    closing brace arrives. Only object items are returned, scalar items of the array are skipped.
+    """
+
+    def __init__(self, array_key: str):
+        self.array_key = array_key
+        self.text = ""
+        self._position = 0
+        # Open containers, "{" or "["
+        self._stack: typing.List[str] = []
+        self._in_string = False
+        self._escaped = False
+        self._string_start = None
+        # Last string closed directly inside the top level object, which is the key of a following array
+        self._last_top_level_string = None
+        self._in_array = False
+        self._item_start = None
+
+    def feed(self, chunk: str) -> typing.List[typing.Dict]:
+        """Adds the chunk of text and returns the items completed by it."""
+        self.text += chunk
+        text = self.text
+        items = []
+        for position in range(self._position, len(text)):
+            char = text[position]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        self._last_top_level_string = text[self._string_start + 1:position]
+            elif char == '"':
+                self._in_string = True
+                self._string_start = position
+            elif char in "{[":
+                if (
+                    char == "["
+                    and self._stack == ["{"]
+                    and self._last_top_level_string == self.array_key
+                ):
+                    self._in_array = True
+                elif char == "{" and self._in_array and len(self._stack) == 2:
+                    self._item_start = position
+                self._stack.append(char)
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if self._in_array:
+                    if len(self._stack) == 2 and char == "}" and self._item_start is not None:
+                        items.append(json.loads(text[self._item_start:position + 1]))
+                        self._item_start = None
+                    elif len(self._stack) == 1:
+                        self._in_array = False
+        self._position = len(text)
+        return items
@@ -0,0 +1,72 @@
+import contextlib
+import contextvars
+import logging
+import typing
+
+logger = logging.getLogger(__name__)
+
+_llm_usage_calls: contextvars.ContextVar[typing.Optional[typing.List[typing.Dict]]] = contextvars.ContextVar(
+    "llm_usage_calls", default=None
+)
+
+USAGE_COUNTERS = ("prompt_tokens", "completion_tokens", "total_tokens", "latency", "retries")
+
+
+@contextlib.contextmanager
+def collect_llm_usage():
+    """
+    Collects the usage of the LLM calls made inside the block, in the current thread or task (and threads run
+    with sync_to_async from it). Yields the list the calls are appended to.
+    """
+    calls = []
+    token = _llm_usage_calls.set(calls)
+    try:
+        yield calls
+    finally:
+        _llm_usage_calls.reset(token)
+
+
+def record_llm_usage(
+    *,
+    prompt_name: str,
+    llm_config_name: typing.Optional[str],
+    model: typing.Optional[str],
+    usage=None,
+    latency: float = 0,
+    cache_hit: bool = False,
+    retries: int = 0,
+):
+    """Records an LLM call in the active collect_llm_usage block, if any. usage is the litellm response usage."""
+    call = {
+        "prompt_name": prompt_name,
+        "llm_config_name": llm_config_name,
+        "model": model,
+        "prompt_tokens": getattr(usage, "prompt_tokens", None),
+        "completion_tokens": getattr(usage, "completion_tokens", None),
+        "total_tokens": getattr(usage, "total_tokens", None),
+        "latency": round(latency, 3),
+        "cache_hit": cache_hit,
+        "retries": retries,
+    }
+    logger.debug(f"LLM call usage - {call}")
+    calls = _llm_usage_calls.get()
+    if calls is not None:
+        calls.append(call)
+
+
+def summarize_llm_usage(calls: typing.Iterable[typing.Dict]) -> typing.Dict:
+    summary = {"calls": 0, "cache_hits": 0, **{counter: 0 for counter in USAGE_COUNTERS}}
+    for call in calls:
+        summary["calls"] += 1
+        summary["cache_hits"] += int(bool(call.get("cache_hit")))
+        for counter in USAGE_COUNTERS:
+            summary[counter] += call.get(counter) or 0
+    summary["latency"] = round(summary["latency"], 3)
+    return summary
+
+
+def summarize_llm_usage_by_prompt(calls: typing.Iterable[typing.Dict]) -> typing.Dict[str, typing.Dict]:
+    calls_by_prompt = {}
+    for call in calls:
+        calls_by_prompt.setdefault(call["prompt_name"], []).append(call)
+    return {prompt_name: summarize_llm_usage(prompt_calls) for prompt_name, prompt_calls in calls_by_prompt.items()}
@@ -193,6 +193,70 @@ CACHES = {
 CACHE_TTL = 60 * 60
 CACHE_ENABLED = True
 
+# Load the CEFR lexicon used by the Vocab processor when a celery worker process starts, if a dag runs Vocab
+PRELOAD_VOCAB_LEXICON = os.environ.get("PRELOAD_VOCAB_LEXICON", "FALSE") == "TRUE"
+# Written by the compile_vocab_lexicon command, json vocab files are used if it doesn't exist
+VOCAB_LEXICON_BINARY_PATH = os.environ.get(
+    "VOCAB_LEXICON_BINARY_PATH", str(BASE_DIR) + "/evaluation/vocab/cefr_lexicon.bin"
+)
+# Lemmas of words not found in the CEFR lexicon, kept in process and optionally in CACHES['default']
+VOCAB_LEMMA_CACHE_SIZE = 50000
+VOCAB_LEMMA_CACHE_TTL = 60 * 60 * 24 * 7
+VOCAB_LEMMA_CACHE_USE_REDIS = True
+
+# In-process entries of the CEFR level service result cache, which is also kept in CACHES['default'] for CACHE_TTL
+CEFR_LEVEL_CACHE_SIZE = 1000
+
+# Cache of LLM responses keyed on prompt template version, rendered messages, model, sampling params and response
+# format. Used only for llm configs with sampling_params temperature 0 in their yaml
+LLM_RESPONSE_CACHE_ENABLED = not (os.environ.get("LLM_RESPONSE_CACHE_ENABLED", "TRUE") == "FALSE")
+LLM_RESPONSE_CACHE_TTL = 60 * 60 * 24
+LLM_RESPONSE_CACHE_SIZE = 500
+# Responses longer than this (in characters) aren't cached
+LLM_RESPONSE_CACHE_MAX_ENTRY_SIZE = 100 * 1024
+
+# Process-local cache of compiled prompt templates, invalidated on PromptTemplate changes through a version
+# counter in CACHES['default'] which is checked at most once per interval (seconds)
+PROMPT_TEMPLATE_CACHE_ENABLED = not (os.environ.get("PROMPT_TEMPLATE_CACHE_ENABLED", "TRUE") == "FALSE")
+PROMPT_TEMPLATE_CACHE_VERSION_CHECK_INTERVAL = 30
+
+# Run processors flagged async_llm in the dag together in one task, using the async LLM client
+ASYNC_LLM_PROCESSORS_ENABLED = os.environ.get("ASYNC_LLM_PROCESSORS_ENABLED", "FALSE") == "TRUE"
+# Max processors run concurrently by one call_event_processors_async task
+ASYNC_LLM_PROCESSOR_CONCURRENCY = 20
+
+# LLM config routing (see OpenAIService.llm_router.LLMRouter), durations are in seconds
+LLM_ROUTER_STATS_TTL = 60 * 60
+LLM_ROUTER_LATENCY_EWMA_ALPHA = 0.2
+LLM_ROUTER_FAILURE_THRESHOLD = 3
+LLM_ROUTER_CIRCUIT_BREAKER_COOLDOWN = 60
+LLM_ROUTER_RATE_LIMIT_COOLDOWN = 30
+
+# Requests wait for the requests_per_minute/tokens_per_minute quotas of llm configs, kept in redis, before sending
+LLM_RATE_LIMIT_ENABLED = not (os.environ.get("LLM_RATE_LIMIT_ENABLED", "TRUE") == "FALSE")
+# Longest a request waits for quota (seconds), after which it is sent anyway
+LLM_RATE_LIMIT_MAX_WAIT = 60
+# Completion tokens reserved per request, corrected with the actual usage after the response
+LLM_RATE_LIMIT_COMPLETION_TOKENS_ESTIMATE = 1000
+
+# Eventflow type (dag) used to evaluate writing answers, "writing_combined" evaluates grammar and coherence
+# in one LLM call. "writing_text_analysis" and "writing_combined" run TextAnalysis as a task before the LLM
+# processors, and send its results to them in their task payloads unless SLIM_TASK_PAYLOADS is enabled.
+WRITING_EVENTFLOW_TYPE = os.environ.get("WRITING_EVENTFLOW_TYPE", "writing")
+
+# Stream LLM responses of processors with a stream_field, saving the items parsed so far as partial results at
+# most once per interval (seconds)
+LLM_STREAMING_ENABLED = os.environ.get("LLM_STREAMING_ENABLED", "FALSE") == "TRUE"
+LLM_STREAMING_PERSIST_INTERVAL = 1
+
+# Send only the eventflow id and processor name in processor tasks, workers load the provider results and root
+# arguments from the db. Enable once all workers run a version which supports it.
+SLIM_TASK_PAYLOADS = os.environ.get("SLIM_TASK_PAYLOADS", "FALSE") == "TRUE"
+
+# Run processors flagged inline in the dag (cheap ones, without LLM calls) directly in the worker which completed
+# their last provider, instead of sending them a task
+INLINE_PROCESSORS_ENABLED = os.environ.get("INLINE_PROCESSORS_ENABLED", "FALSE") == "TRUE"
+
 logging_format = "{asctime}:|{levelname}|{module:25}|{lineno:4}|{message}"
 logging_level = "INFO"
 LOGGING = {
@@ -0,0 +1,152 @@
+"""
+Caching helpers shared across the application.
+"""
+
+import hashlib
+import logging
+import threading
+import typing
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+def get_content_hash(*parts: str) -> str:
+    """
+    Returns a stable hash of the given strings, for use as a cache key.
+
+    Args:
+        parts: Strings identifying the cached content
+
+    Returns:
+        Hex sha256 digest of the parts
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """
+    Thread safe, bounded, in-process LRU cache.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: typing.Iterable[str]) -> typing.Dict[str, typing.Any]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._data:
+                    self._data.move_to_end(key)
+                    found[key] = self._data[key]
+        return found
+
+    def set_many(self, mapping: typing.Dict[str, typing.Any]):
+        with self._lock:
+            for key, value in mapping.items():
+                self._data[key] = value
+                self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TwoTierCache:
+    """
+    In-process LRU cache in front of the shared django cache (CACHES['default'], redis).
+
+    Values found only in the shared cache are copied into the local cache. The shared cache is skipped when
+    use_shared_cache is False or CACHE_ENABLED is off, and its errors are logged and treated as misses, so a
+    redis outage only costs the cached work being redone.
+    """
+
+    def __init__(
+        self,
+        *,
+        namespace: str,
+        maxsize: int,
+        timeout: typing.Optional[int] = None,
+        use_shared_cache: bool = True,
+    ):
+        self.namespace = namespace
+        self.timeout = settings.CACHE_TTL if timeout is None else timeout
+        self.use_shared_cache = use_shared_cache and settings.CACHE_ENABLED
+        self._local = LRUCache(maxsize)
+        self._stats_lock = threading.Lock()
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def _get_shared_key(self, key: str) -> str:
+        return f"{self.namespace}:{get_content_hash(key)}"
+
+    def get_many(self, keys: typing.Iterable[str]) -> typing.Dict[str, typing.Any]:
+        keys = list(dict.fromkeys(keys))
+        found = self._local.get_many(keys)
+        local_hits = len(found)
+
+        missing = [key for key in keys if key not in found]
+        shared_found = {}
+        if missing and self.use_shared_cache:
+            shared_keys = {self._get_shared_key(key): key for key in missing}
+            try:
+                shared_values = cache.get_many(list(shared_keys))
+            except Exception as e:
+                logger.warning(f"Error reading {self.namespace} values from shared cache - {e}")
+                shared_values = {}
+            shared_found = {shared_keys[shared_key]: value for shared_key, value in shared_values.items()}
+            if shared_found:
+                self._local.set_many(shared_found)
+                found.update(shared_found)
+
+        with self._stats_lock:
+            self.local_hits += local_hits
+            self.shared_hits += len(shared_found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key: str, default=None):
+        return self.get_many([key]).get(key, default)
+
+    def set_many(self, mapping: typing.Dict[str, typing.Any]):
+        if not mapping:
+            return
+        self._local.set_many(mapping)
+        if self.use_shared_cache:
+            try:
+                cache.set_many(
+                    {self._get_shared_key(key): value for key, value in mapping.items()},
+                    timeout=self.timeout,
+                )
+            except Exception as e:
+                logger.warning(f"Error writing {self.namespace} values to shared cache - {e}")
+
+    def set(self, key: str, value):
+        self.set_many({key: value})
+
+    def clear_local(self):
+        self._local.clear()
+
+    def stats(self) -> typing.Dict[str, int]:
+        with self._stats_lock:
+            return {
+                "local_hits": self.local_hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "local_size": len(self._local),
+            }
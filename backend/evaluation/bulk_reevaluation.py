@@ -0,0 +1,248 @@
+"""
+Re-scoring of evaluated writing attempts with the current grammar and coherence prompts, through a provider batch
+API instead of the online eventflow. Used by the bulk_reevaluate command.
+
+Prompts are rendered by LLMCommunicationWrapper and submitted in batches, and the batches and the requests in
+them are recorded in a json manifest. Collecting reads the manifest, fetches the results of the completed
+batches and rebuilds QuestionAttempt.eval_data the same way the writing dag does, then re-aggregates
+AssessmentAttempt.eval_data of the affected assessments with AssessmentEvaluator.
+"""
+
+import json
+import logging
+import typing
+
+from django.db import transaction
+
+from OpenAIService.batch_providers import BatchProvider, BatchRequest, BatchStatus
+from OpenAIService.repositories import LLMCommunicationWrapper, ValidPromptTemplates
+from evaluation.enums import QuestionType
+from evaluation.evaluators.AssessmentEvaluator import AssessmentEvaluator
+from evaluation.event_flow.helpers.text_analysis import analyse_text
+from evaluation.event_flow.processors.base_grammar import BaseGrammar, Response as GrammarResponse
+from evaluation.event_flow.processors.coherence import Coherence, Response as CoherenceResponse
+from evaluation.event_flow.processors.db_saver_processors import WritingSaver
+from evaluation.event_flow.processors.writing_final_score import WritingFinalScore
+from evaluation.models import AssessmentAttempt, QuestionAttempt
+
+logger = logging.getLogger(__name__)
+
+
+class ReevaluationTarget:
+    """An LLM processor of the writing dag which can be re-evaluated in batch"""
+
+    def __init__(self, *, processor_name, prompt_name, response_format_class, get_context, get_result):
+        self.processor_name = processor_name
+        self.prompt_name = prompt_name
+        self.response_format_class = response_format_class
+        self.get_context = get_context
+        self.get_result = get_result
+
+
+REEVALUATION_TARGETS = {
+    "grammar": ReevaluationTarget(
+        processor_name="InterviewPrepGrammar",
+        prompt_name=ValidPromptTemplates.GRAMMAR_PROCESSOR,
+        response_format_class=GrammarResponse,
+        get_context=lambda question_attempt: {"user_answer": question_attempt.answer_text},
+        get_result=lambda question_attempt, response: BaseGrammar.get_result(
+            response,
+            user_answer=question_attempt.answer_text,
+            text_analysis=analyse_text(question_attempt.answer_text),
+            question_type=QuestionType.INTERVIEW_PREP,
+        ),
+    ),
+    "coherence": ReevaluationTarget(
+        processor_name="Coherence",
+        prompt_name=ValidPromptTemplates.COHERENCE_PROCESSOR,
+        response_format_class=CoherenceResponse,
+        get_context=lambda question_attempt: {
+            "user_answer": question_attempt.answer_text,
+            "question": question_attempt.question.question_data["question"],
+        },
+        get_result=lambda question_attempt, response: Coherence.get_result(response),
+    ),
+}
+
+
+def get_reevaluable_question_attempts():
+    """Writing attempts evaluated by the writing dag (see WritingSaver)"""
+    return (
+        QuestionAttempt.objects.filter(
+            status=QuestionAttempt.Status.EVALUATED,
+            answer_text__isnull=False,
+            eval_data__has_key="coherence",
+        )
+        .exclude(answer_text="")
+        .select_related("question")
+        .order_by("id")
+    )
+
+
+def get_custom_id(question_attempt_id, target_name) -> str:
+    return f"{question_attempt_id}:{target_name}"
+
+
+def parse_custom_id(custom_id: str) -> typing.Tuple[int, str]:
+    question_attempt_id, target_name = custom_id.split(":")
+    return int(question_attempt_id), target_name
+
+
+def build_batch_requests(question_attempts, target_names) -> typing.List[BatchRequest]:
+    requests = []
+    for question_attempt in question_attempts:
+        for target_name in target_names:
+            target = REEVALUATION_TARGETS[target_name]
+            llm_request = LLMCommunicationWrapper.prepare_request(
+                target.prompt_name,
+                target.response_format_class,
+                target.get_context(question_attempt),
+                use_cache=False,
+            )
+            requests.append(
+                BatchRequest(
+                    custom_id=get_custom_id(question_attempt.id, target_name),
+                    messages=llm_request.messages,
+                    response_format_class=target.response_format_class,
+                )
+            )
+    return requests
+
+
+def submit_reevaluation(
+    *,
+    provider: BatchProvider,
+    question_attempts,
+    target_names: typing.List[str],
+    batch_size: int,
+) -> typing.Dict:
+    """Submits the requests in batches of batch_size and returns the manifest of the batches"""
+    manifest = {"targets": target_names, "batches": []}
+    question_attempts = list(question_attempts)
+    requests_per_attempt = len(target_names)
+    attempts_per_batch = max(1, batch_size // requests_per_attempt)
+    for start in range(0, len(question_attempts), attempts_per_batch):
+        chunk = question_attempts[start:start + attempts_per_batch]
+        requests = build_batch_requests(chunk, target_names)
+        batch_id = provider.submit(requests)
+        manifest["batches"].append(
+            {
+                "batch_id": batch_id,
+                "status": BatchStatus.IN_PROGRESS,
+                "question_attempt_ids": [question_attempt.id for question_attempt in chunk],
+            }
+        )
+        logger.info(f"Submitted re-evaluation batch {batch_id} of {len(requests)} requests")
+    return manifest
+
+
+def apply_reevaluation_results(question_attempt: QuestionAttempt, responses: typing.Dict[str, typing.Dict]):
+    """
+    Replaces the results of the re-evaluated processors in eval_data and recomputes the scores. responses are the
+    parsed LLM responses by target name.
+    """
+    eval_data = question_attempt.eval_data or {}
+    inputs = {
+        "InterviewPrepGrammar": (eval_data.get("grammar") or {}).get("details"),
+        "Coherence": (eval_data.get("coherence") or {}).get("details"),
+    }
+    vocab_details = (eval_data.get("vocab") or {}).get("details")
+    if vocab_details:
+        inputs["Vocab"] = vocab_details
+    for target_name, response in responses.items():
+        target = REEVALUATION_TARGETS[target_name]
+        inputs[target.processor_name] = target.get_result(question_attempt, response)
+
+    inputs["WritingFinalScore"] = WritingFinalScore.get_scores(inputs)
+    question_attempt.eval_data = WritingSaver.get_eval_data(inputs)
+    question_attempt.save(update_fields=["eval_data", "updated_at"])
+
+
+def collect_reevaluation(*, provider: BatchProvider, manifest: typing.Dict) -> typing.Dict[str, int]:
+    """
+    Applies the results of the batches of the manifest which completed since the last collect, re-aggregates the
+    assessment attempts of the updated question attempts, and updates the status of the batches in the manifest.
+    Returns counts of batches and attempts by outcome.
+    """
+    counts = {"batches_pending": 0, "batches_failed": 0, "attempts_updated": 0, "attempts_failed": 0}
+    updated_assessment_attempt_ids = set()
+    for batch in manifest["batches"]:
+        if batch["status"] != BatchStatus.IN_PROGRESS:
+            continue
+        status = provider.get_status(batch["batch_id"])
+        if status == BatchStatus.IN_PROGRESS:
+            counts["batches_pending"] += 1
+            continue
+        if status == BatchStatus.FAILED:
+            logger.error(f"Re-evaluation batch {batch['batch_id']} failed")
+            batch["status"] = BatchStatus.FAILED
+            counts["batches_failed"] += 1
+            continue
+
+        responses_by_attempt = {}
+        unparsable_attempt_ids = set()
+        for custom_id, content in provider.get_results(batch["batch_id"]).items():
+            question_attempt_id, target_name = parse_custom_id(custom_id)
+            if content is None:
+                continue
+            try:
+                response = json.loads(content)
+            except ValueError as e:
+                logger.error(
+                    f"Invalid re-evaluation response {custom_id} in batch {batch['batch_id']} - {e} - {content!r}"
+                )
+                unparsable_attempt_ids.add(question_attempt_id)
+                continue
+            responses_by_attempt.setdefault(question_attempt_id, {})[target_name] = response
+
+        question_attempts = QuestionAttempt.objects.select_related("question").in_bulk(
+            batch["question_attempt_ids"]
+        )
+        failed_attempt_ids = []
+        for question_attempt_id in batch["question_attempt_ids"]:
+            responses = responses_by_attempt.get(question_attempt_id, {})
+            question_attempt = question_attempts.get(question_attempt_id)
+            if (
+                question_attempt is None
+                or question_attempt_id in unparsable_attempt_ids
+                or set(responses) != set(manifest["targets"])
+            ):
+                failed_attempt_ids.append(question_attempt_id)
+                continue
+            try:
+                with transaction.atomic():
+                    apply_reevaluation_results(question_attempt, responses)
+            except Exception as e:
+                logger.exception(f"Failed to apply re-evaluation of question attempt {question_attempt_id} - {e}")
+                failed_attempt_ids.append(question_attempt_id)
+                continue
+            counts["attempts_updated"] += 1
+
+        batch["status"] = BatchStatus.COMPLETED
+        batch["failed_question_attempt_ids"] = failed_attempt_ids
+        counts["attempts_failed"] += len(failed_attempt_ids)
+        updated_assessment_attempt_ids.update(
+            question_attempts[question_attempt_id].assessment_attempt_id_id
+            for question_attempt_id in batch["question_attempt_ids"]
+            if question_attempt_id not in failed_attempt_ids
+        )
+
+    counts["assessments_updated"] = reaggregate_assessment_attempts(updated_assessment_attempt_ids)
+    return counts
+
+
+def reaggregate_assessment_attempts(assessment_attempt_ids: typing.Iterable[int]) -> int:
+    """
+    Recomputes the scores of the assessment attempts from the re-evaluated question attempts, as
+    AssessmentEvaluatorProcessor does at the end of the writing dag. Returns the number of attempts updated.
+    """
+    updated = 0
+    for assessment_attempt in AssessmentAttempt.objects.filter(assessment_id__in=assessment_attempt_ids):
+        try:
+            with transaction.atomic():
+                AssessmentEvaluator(assessment_attempt).reaggregate()
+        except Exception as e:
+            logger.exception(f"Failed to re-aggregate assessment attempt {assessment_attempt.assessment_id} - {e}")
+            continue
+        updated += 1
+    return updated
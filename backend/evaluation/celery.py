@@ -7,7 +7,7 @@ from celery.signals import setup_logging
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "assessments.settings")
-from celery.signals import before_task_publish, task_prerun
+from celery.signals import before_task_publish, task_prerun, worker_process_init
 
 import logging
 
@@ -65,6 +65,30 @@ def config_loggers(*args, **kwags):
     dictConfig(settings.LOGGING)
 
 
+@worker_process_init.connect
+def warm_vocab_lexicon(*args, **kwargs):
+    """
+    Loads the CEFR lexicon (vocab data files + spaCy pipeline) once in every prefork worker process, so that
+    the first Vocab processor run in the process doesn't pay for it. Solo/threads pools load it lazily instead.
+    """
+    from django.conf import settings
+
+    if not settings.PRELOAD_VOCAB_LEXICON:
+        return
+
+    from evaluation.event_flow.core.dag_config import DAG
+
+    if not any("Vocab" in dag["processors"] for dag in DAG.values()):
+        return
+
+    from evaluation.vocab.vocab import get_lexicon
+
+    try:
+        get_lexicon()
+    except Exception as e:
+        logger.exception(f"Failed to preload CEFR lexicon, it will be loaded on first use - {e}")
+
+
 # Load task modules from all registered Django apps.
 
 
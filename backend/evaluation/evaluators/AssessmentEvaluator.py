@@ -59,6 +59,25 @@ class AssessmentEvaluator:
         if not self._should_start_evaluation():
             return
         logger.info(f"🔍🔍🔍 Starting ASSESSMENT EVALUATOR evaluation. 🔍🔍🔍")
+        self.assessment_attempt.eval_data = self.get_eval_data()
+
+        self.assessment_attempt.status = AssessmentAttempt.Status.COMPLETED
+        self.assessment_attempt.evaluation_triggered = True
+
+        self.assessment_attempt.save()
+
+    def reaggregate(self):
+        """
+        Recomputes eval_data of an already evaluated assessment attempt from the current eval_data of its question
+        attempts, e.g. after they are re-evaluated by bulk_reevaluate. Attempts not evaluated yet are left to evaluate.
+        """
+        if not self.assessment_attempt.evaluation_triggered:
+            return
+        logger.info(f"Re-aggregating eval_data of assessment attempt {self.assessment_attempt.assessment_id}")
+        self.assessment_attempt.eval_data = self.get_eval_data()
+        self.assessment_attempt.save(update_fields=["eval_data", "updated_at"])
+
+    def get_eval_data(self):
         score = 0
         max_score = 0
         overall_percentage = 0
@@ -188,10 +207,4 @@ class AssessmentEvaluator:
             "total_score": score,
             "performance_tag": performance_tag,
         }
-
-        self.assessment_attempt.eval_data = eval_data
-
-        self.assessment_attempt.status = AssessmentAttempt.Status.COMPLETED
-        self.assessment_attempt.evaluation_triggered = True
-
-        self.assessment_attempt.save()
+        return eval_data
@@ -1,6 +1,7 @@
 from datetime import datetime, timedelta
 import json
 import logging
+from django.conf import settings
 from evaluation.evaluators.AnswerEvaluator import AnswerEvaluator
 from evaluation.event_flow.core.orchestrator import Orchestrator
 from evaluation.models import QuestionAttempt
@@ -25,7 +26,7 @@ class WritingAnswerEvaluator(AnswerEvaluator):
         logger.info(f"answer text: {self.question_attempt.answer_text}")
 
         eventflow_id = Orchestrator.start_new_eventflow(
-            eventflow_type="writing",
+            eventflow_type=settings.WRITING_EVENTFLOW_TYPE,
             root_args={
                 "text": self.question_attempt.answer_text,
                 "evaluation_id": str(self.question_attempt.evaluation_id),
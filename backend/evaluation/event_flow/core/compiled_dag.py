@@ -0,0 +1,79 @@
+import typing
+from collections import deque
+from functools import lru_cache
+
+from evaluation.event_flow.core.dag_config import DAG
+
+
+class CompiledDAG:
+    """
+    Scheduling data of a dag from dag_config, derived once per eventflow type (see get_compiled_dag).
+    in_degree of a processor is the number of its providers, which is what its pending_providers counter starts at.
+    """
+
+    def __init__(self, eventflow_type: str, dag: typing.Dict):
+        self.eventflow_type = eventflow_type
+        self.dag = dag
+        processors = dag["processors"]
+
+        dependents = {name: [] for name in processors}
+        for name, values in processors.items():
+            for provider_name in values["depends_on"]:
+                if provider_name not in processors:
+                    raise ValueError(
+                        f"{name} depends on {provider_name}, which is not present in the {eventflow_type} dag"
+                    )
+                dependents[provider_name].append(name)
+
+        self.providers = {name: tuple(values["depends_on"]) for name, values in processors.items()}
+        self.provides = {name: tuple(values.get("provides", ())) for name, values in processors.items()}
+        self.dependents = {name: tuple(names) for name, names in dependents.items()}
+        self.in_degree = {name: len(providers) for name, providers in self.providers.items()}
+        self.roots = tuple(name for name, in_degree in self.in_degree.items() if in_degree == 0)
+        self.topological_order = self._get_topological_order()
+
+    def _get_topological_order(self) -> typing.Tuple[str, ...]:
+        in_degree = dict(self.in_degree)
+        queue = deque(self.roots)
+        order = []
+        while queue:
+            name = queue.popleft()
+            order.append(name)
+            for dependent in self.dependents[name]:
+                in_degree[dependent] -= 1
+                if in_degree[dependent] == 0:
+                    queue.append(dependent)
+
+        if len(order) != len(in_degree):
+            cyclic_processors = [name for name, degree in in_degree.items() if degree > 0]
+            raise ValueError(f"The {self.eventflow_type} dag has a cycle between {cyclic_processors}")
+        return tuple(order)
+
+    def assemble_results(self, results_by_processor: typing.Dict[str, typing.Dict]) -> typing.Dict:
+        """
+        Inputs of a dependent from the results of its providers. A provider with "provides" contributes the results
+        of the processors it provides, in their place.
+        """
+        assembled_results = {}
+        for processor_name, result in results_by_processor.items():
+            provided_processors = self.provides.get(processor_name)
+            if provided_processors:
+                for provided_processor in provided_processors:
+                    assembled_results[provided_processor] = result[provided_processor]
+            else:
+                assembled_results[processor_name] = result
+        return assembled_results
+
+    def get_pending_provider_counts(
+        self, processor_names: typing.Iterable[str], done_processor_names: typing.Collection[str] = ()
+    ) -> typing.Dict[str, int]:
+        """Number of providers of each processor which are not in done_processor_names."""
+        return {
+            name: sum(1 for provider_name in self.providers[name] if provider_name not in done_processor_names)
+            for name in processor_names
+        }
+
+
+@lru_cache(maxsize=None)
+def get_compiled_dag(eventflow_type: str) -> CompiledDAG:
+    return CompiledDAG(eventflow_type, DAG[eventflow_type])
@@ -1,15 +1,53 @@
 DAG = {
+    # Kept as it was before TextAnalysis, so that eventflows created with it can still be retried and restarted.
+    # Default for new writing eventflows, see WRITING_EVENTFLOW_TYPE.
     "writing": {
         "processors": {
             # "Vocab": {"depends_on": []},
-            "InterviewPrepGrammar": {"depends_on": []},
-            "Coherence": {"depends_on": []},
-            "WritingFinalScore": {"depends_on": ["InterviewPrepGrammar", "Coherence"]},
+            # async_llm processors are run together by call_event_processors_async, see ASYNC_LLM_PROCESSORS_ENABLED
+            "InterviewPrepGrammar": {"depends_on": [], "async_llm": True},
+            "Coherence": {"depends_on": [], "async_llm": True},
+            # inline processors are run by the worker completing their last provider, see INLINE_PROCESSORS_ENABLED.
+            # Roots are always sent as tasks.
+            "WritingFinalScore": {"depends_on": ["InterviewPrepGrammar", "Coherence"], "inline": True},
             "WritingSaver": {
-                "depends_on": ["InterviewPrepGrammar", "Coherence", "WritingFinalScore"]
+                "depends_on": ["InterviewPrepGrammar", "Coherence", "WritingFinalScore"],
+                "inline": True,
             },
             "AssessmentEvaluatorProcessor": {"depends_on": ["WritingSaver"]},
         },
         "termination_processor": {"AbortHandler": {}},
     },
+    # Same as writing, with the answer read and tokenized once by TextAnalysis for the processors after it
+    "writing_text_analysis": {
+        "processors": {
+            "TextAnalysis": {"depends_on": []},
+            # "Vocab": {"depends_on": ["TextAnalysis"]},
+            "InterviewPrepGrammar": {"depends_on": ["TextAnalysis"], "async_llm": True},
+            "Coherence": {"depends_on": ["TextAnalysis"], "async_llm": True},
+            "WritingFinalScore": {"depends_on": ["InterviewPrepGrammar", "Coherence"], "inline": True},
+            "WritingSaver": {
+                "depends_on": ["InterviewPrepGrammar", "Coherence", "WritingFinalScore"],
+                "inline": True,
+            },
+            "AssessmentEvaluatorProcessor": {"depends_on": ["WritingSaver"]},
+        },
+        "termination_processor": {"AbortHandler": {}},
+    },
+    # Same as writing_text_analysis, with grammar and coherence evaluated in one LLM call. A processor's "provides"
+    # lists the processors whose results it returns (keyed by their names), which its dependents receive in their
+    # place.
+    "writing_combined": {
+        "processors": {
+            "TextAnalysis": {"depends_on": []},
+            "GrammarCoherence": {
+                "depends_on": ["TextAnalysis"],
+                "provides": ["InterviewPrepGrammar", "Coherence"],
+            },
+            "WritingFinalScore": {"depends_on": ["GrammarCoherence"], "inline": True},
+            "WritingSaver": {"depends_on": ["GrammarCoherence", "WritingFinalScore"], "inline": True},
+            "AssessmentEvaluatorProcessor": {"depends_on": ["WritingSaver"]},
+        },
+        "termination_processor": {"AbortHandler": {}},
+    },
 }
@@ -1,15 +1,17 @@
-from collections import defaultdict
 from enum import Enum
 import typing
 import logging
+from django.conf import settings
 from django.db import transaction
 from evaluation.tasks import call_event_processor
 from evaluation.mixins import BaseLoggerMixin
 from evaluation.event_flow.helpers.db_helper import EventFlowDbHelper
+from evaluation.event_flow.processors.registry import get_event_processor_class
 
 from evaluation.models import EventFlow, EventFlowProcessorState
 from evaluation.celery import app
 from evaluation.event_flow.core.dag_config import DAG
+from evaluation.event_flow.core.compiled_dag import get_compiled_dag
 
 
 logger = logging.getLogger(__name__)
@@ -41,7 +43,7 @@ class Orchestrator(BaseLoggerMixin):
     def start_new_eventflow(
         *, eventflow_type: str = "default", root_args: typing.Dict, initiated_by: str
     ) -> str:
-        dag = Orchestrator.get_dag_from_eventflow_type(eventflow_type)
+        compiled_dag = get_compiled_dag(eventflow_type)
 
         # Use transaction atomic to ensure EventFlow and processor states are created atomically
         with transaction.atomic():
@@ -53,7 +55,7 @@ class Orchestrator(BaseLoggerMixin):
             )
 
             Orchestrator.initialise_eventflow_processors(
-                ef.id, dag["processors"].keys()
+                ef.id, compiled_dag.topological_order, pending_provider_counts=compiled_dag.in_degree
             )
 
             logger.info(
@@ -65,12 +67,16 @@ class Orchestrator(BaseLoggerMixin):
         return ef.id
 
     @staticmethod
-    def initialise_eventflow_processors(eventflow_id, processor_names):
+    def initialise_eventflow_processors(eventflow_id, processor_names, pending_provider_counts=None):
+        if pending_provider_counts is None:
+            pending_provider_counts = {}
         efp_states = []
         for processor in processor_names:
             efp_states.append(
                 EventFlowProcessorState(
-                    event_flow_id=eventflow_id, processor_name=processor
+                    event_flow_id=eventflow_id,
+                    processor_name=processor,
+                    pending_providers=pending_provider_counts.get(processor),
                 )
             )
 
@@ -79,10 +85,11 @@ class Orchestrator(BaseLoggerMixin):
     @staticmethod
     def reset_and_restart_eventflow(*, eventflow_id):
         ef_db_helper = EventFlowDbHelper(eventflow_id)
-        dag = Orchestrator.get_dag_from_eventflow_type(ef_db_helper.eventflow_type)
+        compiled_dag = get_compiled_dag(ef_db_helper.eventflow_type)
         ef_db_helper.reset_all_processors_state(
-            termination_processors=dag["termination_processor"].keys()
+            termination_processors=compiled_dag.dag["termination_processor"].keys()
         )
+        ef_db_helper.set_pending_providers(compiled_dag.in_degree)
         logger.info(
             f"OrchestratorLog:[{eventflow_id}]:Restarting eventflow, Type-{ef_db_helper.eventflow_type}, with args {ef_db_helper.eventflow_root_args}"
         )
@@ -120,12 +127,15 @@ class Orchestrator(BaseLoggerMixin):
                     f"providers are not done. Won't restart. Fix state manually. Eventflow id - {self.id}."
                 )
         self.ef_db_helper.reset_aborted_and_error_processor_states()
+        self.reset_pending_providers()
         self.ef_db_helper.delete_processors(list(termination_processors))
         self.ef_db_helper.set_eventflow_status(EventFlow.Status.STARTED)
         for processor_name in error_processor_names:
             if processor_name in termination_processors:
                 continue
-            self.call_next_processor(processor_name)
+            self.call_next_processor(
+                processor_name, claimable_statuses=(EventFlowProcessorState.Status.ERROR,)
+            )
 
     def __init__(
         self,
@@ -143,32 +153,17 @@ class Orchestrator(BaseLoggerMixin):
         else:
             self.root_args = root_args
 
-        self.dag = Orchestrator.get_dag_from_eventflow_type(
-            self.ef_db_helper.eventflow.type
-        )
-
-        self.provider_to_dependents_dict = defaultdict(list)
-
-        for name, values in self.dag["processors"].items():
-            for provider_name in values["depends_on"]:
-                self.provider_to_dependents_dict[provider_name].append(name)
-
-        self.log_debug(
-            f"Provider to dependents dict for tree {self.id} - {self.provider_to_dependents_dict}"
-        )
+        self.compiled_dag = get_compiled_dag(self.ef_db_helper.eventflow.type)
+        self.dag = self.compiled_dag.dag
 
         if initial:
-            root_processors = [
-                k
-                for k, v in self.dag["processors"].items()
-                if len(v["depends_on"]) == 0
-            ]
+            root_processors = list(self.compiled_dag.roots)
             self.log_debug(f"Initial processors being called - {root_processors}")
-            for processor in root_processors:
-                logger.info(
-                    f"🔍🔍🔍 Orchestrator.initialise_eventflow_processors() CALLING ROOT PROCESSOR: {processor} 🔍🔍🔍"
-                )
-                self.call_next_processor(processor)
+            logger.info(
+                f"🔍🔍🔍 Orchestrator.initialise_eventflow_processors() CALLING ROOT PROCESSORS: {root_processors} 🔍🔍🔍"
+            )
+            # Roots are started by the caller of the eventflow, e.g. a web request, so none are executed inline
+            self.call_next_processors(root_processors, allow_inline=False)
 
     def get_all_providers(self, processor_name: str):
         return self.dag["processors"][processor_name]["depends_on"]
@@ -201,25 +196,54 @@ class Orchestrator(BaseLoggerMixin):
         self, *, processor_name: str, result_dict: typing.Dict, error_stacktrace=None
     ):
         if error_stacktrace is None:
-            self.ef_db_helper.mark_processor_complete(
+            newly_completed = self.ef_db_helper.mark_processor_complete(
                 processor_name=processor_name, result_dict=result_dict
             )
         else:
-            self.ef_db_helper.mark_processor_complete_with_error(
+            newly_completed = self.ef_db_helper.mark_processor_complete_with_error(
                 processor_name=processor_name,
                 result_dict=result_dict,
                 error_stacktrace=error_stacktrace,
             )
 
-        if not self.ef_db_helper.is_eventflow_terminated:
-            for depending_processor in self.provider_to_dependents_dict[processor_name]:
-                if self.check_if_providers_are_done(processor_name=depending_processor):
-                    self.call_next_processor(depending_processor)
+        if not newly_completed:
+            self.log_info(f"Not calling dependent processors for {processor_name} since it had already completed")
+        elif not self.ef_db_helper.is_eventflow_terminated:
+            self.call_next_processors(self.get_ready_dependents(processor_name))
         else:
             self.log_info(
                 f"Not calling dependent processor for {processor_name} since this event_flow has been terminated"
             )
 
+    def get_ready_dependents(self, processor_name: str) -> typing.List[str]:
+        """
+        Decrements the pending_providers counters of the dependents of a completed processor and returns the ones
+        whose providers are now all done. Dependents without a counter fall back to querying their providers.
+        """
+        dependents = self.compiled_dag.dependents.get(processor_name, ())
+        pending_provider_counts = self.ef_db_helper.decrement_pending_providers(dependents)
+        return [
+            dependent
+            for dependent in dependents
+            if (
+                pending_provider_counts[dependent] == 0
+                if dependent in pending_provider_counts
+                else self.check_if_providers_are_done(processor_name=dependent)
+            )
+        ]
+
+    def reset_pending_providers(self):
+        """Recomputes the pending_providers counters of the processors which aren't complete, from their states."""
+        completed_processor_names = set(
+            self.ef_db_helper.get_processor_names_by_status(EventFlowProcessorState.Status.COMPLETED)
+        )
+        self.ef_db_helper.set_pending_providers(
+            self.compiled_dag.get_pending_provider_counts(
+                [name for name in self.compiled_dag.topological_order if name not in completed_processor_names],
+                completed_processor_names,
+            )
+        )
+
     def check_if_providers_are_done(self, *, processor_name: str):
         providers = self.dag["processors"][processor_name]["depends_on"]
         return self.ef_db_helper.are_given_processors_done(processor_names=providers)
@@ -227,19 +251,20 @@ class Orchestrator(BaseLoggerMixin):
     def get_assembled_results(
         self, *, processor_names: typing.List[str]
     ) -> typing.Dict:
-        results_to_be_sent = {}
-
-        processor_states = self.ef_db_helper.get_processor_states(
-            processor_names=processor_names
+        return self.compiled_dag.assemble_results(
+            self.ef_db_helper.get_processor_results(processor_names)
         )
 
-        for processor, state in processor_states.items():
-            results_to_be_sent[processor] = state.result
-
-        return results_to_be_sent
-
-    def call_next_processor(self, processor_name: str):
-
+    def get_processor_call(
+        self,
+        processor_name: str,
+        claimable_statuses=(EventFlowProcessorState.Status.PENDING,),
+    ) -> typing.Optional[typing.Dict]:
+        """
+        Claims the processor (see EventFlowDbHelper.claim_processor) and returns the call_event_processor kwargs to
+        run it with, or None if it was already claimed, e.g. by another worker completing one of its providers.
+        With SLIM_TASK_PAYLOADS the kwargs leave out the inputs and root arguments, the processor loads them.
+        """
         if processor_name in self.dag["processors"]:
             providers = self.dag["processors"][processor_name]["depends_on"]
         elif processor_name in self.dag["termination_processor"]:
@@ -247,6 +272,13 @@ class Orchestrator(BaseLoggerMixin):
         else:
             raise KeyError(f"Error, {processor_name} is not present in the dag")
 
+        if not self.ef_db_helper.claim_processor(processor_name, claimable_statuses):
+            self.log_info(f"Not calling processor - {processor_name} since it has already been claimed")
+            return None
+
+        if settings.SLIM_TASK_PAYLOADS:
+            return {"processor_name": processor_name, "eventflow_id": self.id}
+
         assembled_results = {}
         if providers:
             assembled_results = self.get_assembled_results(processor_names=providers)
@@ -255,19 +287,99 @@ class Orchestrator(BaseLoggerMixin):
             f"Calling processor - {processor_name} with inputs of - {list(assembled_results.keys())}"
         )
 
-        self.ef_db_helper.mark_processor_inprogress(processor_name)
+        return {
+            "processor_name": processor_name,
+            "eventflow_id": self.id,
+            "root_arguments": self.root_args,
+            "inputs": assembled_results,
+        }
+
+    def is_async_llm_processor(self, processor_name: str) -> bool:
+        return bool(self.dag["processors"].get(processor_name, {}).get("async_llm"))
+
+    def is_inline_processor(self, processor_name: str) -> bool:
+        return bool(self.dag["processors"].get(processor_name, {}).get("inline"))
+
+    def call_next_processors(self, processor_names: typing.List[str], allow_inline: bool = True):
+        """
+        Calls the processors. With ASYNC_LLM_PROCESSORS_ENABLED, processors flagged async_llm in the dag are sent
+        together in one call_event_processors_async task, which keeps their LLM requests in flight concurrently.
+        With INLINE_PROCESSORS_ENABLED and allow_inline, processors flagged inline are executed right here, after the
+        others are sent.
+        """
+        inline_processor_names = []
+        if settings.INLINE_PROCESSORS_ENABLED and allow_inline:
+            inline_processor_names = [
+                processor_name for processor_name in processor_names if self.is_inline_processor(processor_name)
+            ]
+        processor_names = [
+            processor_name for processor_name in processor_names if processor_name not in inline_processor_names
+        ]
+
+        async_llm_processor_names = []
+        if settings.ASYNC_LLM_PROCESSORS_ENABLED:
+            async_llm_processor_names = [
+                processor_name for processor_name in processor_names if self.is_async_llm_processor(processor_name)
+            ]
+
+        for processor_name in processor_names:
+            if processor_name not in async_llm_processor_names:
+                self.call_next_processor(processor_name)
+
+        processor_calls = []
+        for processor_name in async_llm_processor_names:
+            processor_call = self.get_processor_call(processor_name)
+            if processor_call is not None:
+                processor_calls.append(processor_call)
+
+        if processor_calls:
+            claimed_processor_names = [processor_call["processor_name"] for processor_call in processor_calls]
+            logger.info(
+                f"🔍🔍🔍 Orchestrator.call_next_processors() CALLING ASYNC TASK: {claimed_processor_names} 🔍🔍🔍"
+            )
+            result = app.send_task(
+                "evaluation.tasks.call_event_processors_async",
+                kwargs={"processor_calls": processor_calls},
+                queue="evaluation_queue",
+            )
+            logger.info(f"🔍🔍🔍 Task sent successfully! Task ID: {result.id} 🔍🔍🔍")
+
+        for processor_name in inline_processor_names:
+            self.execute_processor_inline(processor_name)
+
+    def execute_processor_inline(self, processor_name: str):
+        """
+        Claims and executes the processor in this process. Its state is recorded as for a processor run by a task,
+        and completing it calls its dependents in turn.
+        """
+        processor_call = self.get_processor_call(processor_name)
+        if processor_call is None:
+            return
+
+        self.log_info(f"Executing processor - {processor_name} inline")
+        processor_class = get_event_processor_class(processor_name)
+        processor_class(
+            eventflow_id=self.id,
+            inputs=processor_call.get("inputs"),
+            root_arguments=processor_call.get("root_arguments"),
+            eventflow=self.ef_db_helper.eventflow,
+        ).execute()
+
+    def call_next_processor(
+        self,
+        processor_name: str,
+        claimable_statuses=(EventFlowProcessorState.Status.PENDING,),
+    ):
+        processor_call = self.get_processor_call(processor_name, claimable_statuses)
+        if processor_call is None:
+            return
 
         logger.info(
             f"🔍🔍🔍 Orchestrator.call_next_processor() CALLING TASK: {processor_name} 🔍🔍🔍"
         )
         result = app.send_task(
             "evaluation.tasks.call_event_processor",
-            kwargs={
-                "processor_name": processor_name,
-                "eventflow_id": self.id,
-                "root_arguments": self.root_args,
-                "inputs": assembled_results,
-            },
+            kwargs=processor_call,
             queue="evaluation_queue",
         )
         logger.info(f"🔍🔍🔍 Task sent successfully! Task ID: {result.id} 🔍🔍🔍")
@@ -1,6 +1,7 @@
 import logging
 import typing
-from django.db import transaction
+from django.db import connection
+from django.db.models import Case, DateTimeField, Exists, F, IntegerField, OuterRef, Value, When
 from django.utils import timezone
 
 from evaluation.models import EventFlow, EventFlowProcessorState
@@ -31,8 +32,27 @@ class EventFlowDbHelper:
         return self.eventflow.root_arguments
 
     def set_eventflow_status(self, status):
+        EventFlow.objects.filter(pk=self.eventflow.pk).update(status=status)
         self.eventflow.status = status
-        self.eventflow.save()
+
+    def complete_eventflow_if_processors_complete(self) -> bool:
+        """
+        Marks the eventflow completed if it has processors and all of them are completed, in one conditional
+        UPDATE, replacing the queries of the check in EventFlow.save. Returns whether the eventflow was completed.
+        """
+        processors = EventFlowProcessorState.objects.filter(event_flow=OuterRef("pk"))
+        termination_fields = self.get_termination_time_fields()
+        completed = EventFlow.objects.filter(
+            Exists(processors),
+            ~Exists(processors.exclude(status=EventFlowProcessorState.Status.COMPLETED)),
+            pk=self.eventflow.pk,
+        ).exclude(status=EventFlow.Status.COMPLETED).update(status=EventFlow.Status.COMPLETED, **termination_fields)
+        if completed:
+            self.eventflow.status = EventFlow.Status.COMPLETED
+            self.eventflow.end_time = termination_fields["end_time"]
+            if self.eventflow.start_time:
+                self.eventflow.run_duration = self.eventflow.end_time - self.eventflow.start_time
+        return bool(completed)
 
     def get_processor_names_by_status(self, status:EventFlowProcessorState.Status):
         return self.eventflow.processors.filter(status=status).values_list("processor_name", flat=True)
@@ -44,6 +64,41 @@ class EventFlowDbHelper:
     def are_given_processors_done(self, processor_names: list[str]):
         return self.eventflow.check_if_given_processors_are_done(processor_names=processor_names)
 
+    def decrement_pending_providers(self, processor_names: typing.Iterable[str]) -> typing.Dict[str, int]:
+        """
+        Decrements the pending_providers counters of the processors, in a single UPDATE ... RETURNING, and returns
+        the decremented counters by processor name. Since the decrement is atomic, exactly one of the providers
+        completing concurrently sees a dependent's counter reach 0. Processors without a counter (states created
+        before it was added) are left out of the result.
+        """
+        processor_names = list(processor_names)
+        if not processor_names:
+            return {}
+
+        table_name = connection.ops.quote_name(EventFlowProcessorState._meta.db_table)
+        eventflow_id = EventFlowProcessorState._meta.get_field("event_flow").get_db_prep_value(
+            self.eventflow.pk, connection
+        )
+        placeholders = ", ".join(["%s"] * len(processor_names))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table_name} SET pending_providers = pending_providers - 1 "
+                f"WHERE event_flow_id = %s AND processor_name IN ({placeholders}) AND pending_providers IS NOT NULL "
+                f"RETURNING processor_name, pending_providers",
+                [eventflow_id, *processor_names],
+            )
+            return dict(cursor.fetchall())
+
+    def set_pending_providers(self, pending_provider_counts: typing.Dict[str, int]):
+        if not pending_provider_counts:
+            return
+        self.eventflow.processors.filter(processor_name__in=pending_provider_counts.keys()).update(
+            pending_providers=Case(
+                *[When(processor_name=name, then=Value(count)) for name, count in pending_provider_counts.items()],
+                output_field=IntegerField(),
+            )
+        )
+
     def get_processor_states(self, processor_names: typing.List[str]) -> typing.Dict:
         # Here' distinct is needed for in_bulk to work, 
         # it would have no effect since for a given even_flow processor_name is anyway unique
@@ -53,76 +108,101 @@ class EventFlowDbHelper:
 
         return processor_states
 
-    @staticmethod
-    def update_processor_termination_time(event_flow_state: EventFlowProcessorState):
-        event_flow_state.end_time = timezone.now()
-        if event_flow_state.start_time is not None:
-            event_flow_state.run_duration = event_flow_state.end_time - event_flow_state.start_time
-        else:
-            logger.warn(
-                f"EventFlowProcessorState, start time wasn't set \
-                efstate_id: {event_flow_state.pk}, processor_name {event_flow_state.processor_name}")
+    def get_processor_results(self, processor_names: typing.Iterable[str]) -> typing.Dict[str, typing.Dict]:
+        processor_names = list(processor_names)
+        if not processor_names:
+            return {}
+        return dict(
+            self.eventflow.processors.filter(processor_name__in=processor_names).values_list("processor_name", "result")
+        )
 
     @staticmethod
-    def update_processor_start_time(event_flow_state: EventFlowProcessorState):
-        event_flow_state.start_time = timezone.now()
-
-    def mark_processor_inprogress(self, processor_name: str):
-        ef_state = self.eventflow.processors.get(
-            processor_name=processor_name
+    def get_termination_time_fields() -> typing.Dict:
+        """update() kwargs setting end_time to now and run_duration from start_time, left null if it wasn't set."""
+        end_time = timezone.now()
+        return {
+            "end_time": end_time,
+            "run_duration": Value(end_time, output_field=DateTimeField()) - F("start_time"),
+        }
+
+    def claim_processor(
+        self,
+        processor_name: str,
+        claimable_statuses: typing.Iterable[EventFlowProcessorState.Status] = (EventFlowProcessorState.Status.PENDING,),
+    ) -> bool:
+        """
+        Marks the processor in progress, only if it is in one of claimable_statuses, with a single conditional update.
+        Returns whether this call claimed it, so that out of concurrent callers exactly one dispatches the processor.
+        Raises EventFlowProcessorState.DoesNotExist if the eventflow has no state for the processor.
+        """
+        claimed = self.eventflow.processors.filter(
+            processor_name=processor_name, status__in=list(claimable_statuses)
+        ).update(status=EventFlowProcessorState.Status.IN_PROGRESS, start_time=timezone.now())
+        if claimed:
+            return True
+        if not self.eventflow.processors.filter(processor_name=processor_name).exists():
+            raise EventFlowProcessorState.DoesNotExist(
+                f"Eventflow {self.eventflow.pk} has no state for processor {processor_name}"
             )
-        ef_state.status = EventFlowProcessorState.Status.IN_PROGRESS
-
-        self.update_processor_start_time(ef_state)
-
-        ef_state.save()
+        return False
+
+    def save_processor_partial_result(self, *, processor_name: str, partial_result: typing.Dict):
+        """
+        Stores the partial result of a processor while it runs. Only in progress states are updated, so a late
+        partial result can't overwrite the final one.
+        """
+        return self.eventflow.processors.filter(
+            processor_name=processor_name, status=EventFlowProcessorState.Status.IN_PROGRESS
+        ).update(result={**partial_result, "partial": True})
+
+    def save_processor_llm_usage(self, *, processor_name: str, llm_usage: typing.Dict):
+        return self.eventflow.processors.filter(processor_name=processor_name).update(llm_usage=llm_usage)
+
+    def _update_incomplete_processor(self, processor_name: str, **fields) -> bool:
+        """
+        Updates the processor state in a single conditional UPDATE, unless it is already complete, so a duplicate
+        or late run can't overwrite the result it completed with. Returns whether the state was updated.
+        """
+        return bool(
+            self.eventflow.processors.filter(processor_name=processor_name)
+            .exclude(status__in=EventFlowProcessorState.COMPLETION_STATES)
+            .update(**fields, **self.get_termination_time_fields())
+        )
 
     def mark_processor_error(self, processor_name: str, stacktrace: str):
-        with transaction.atomic():
-            ef_state = EventFlowProcessorState.objects.select_for_update().get(event_flow=self.eventflow,
-                                                                                processor_name=processor_name)
-            ef_state.error = stacktrace
-            ef_state.status = EventFlowProcessorState.Status.ERROR
-
-            self.update_processor_termination_time(ef_state)
-
-            ef_state.save()
+        """The result is cleared, an incomplete processor's result can only be the partial result of the failed run."""
+        self._update_incomplete_processor(
+            processor_name, error=stacktrace, status=EventFlowProcessorState.Status.ERROR, result=None
+        )
 
     def mark_processor_retriable_error(self, processor_name: str, stacktrace: str):
-        with transaction.atomic():
-            ef_state = EventFlowProcessorState.objects.select_for_update().get(event_flow=self.eventflow,
-                                                                                processor_name=processor_name)
-            ef_state.retriable_error = stacktrace
-            ef_state.status = EventFlowProcessorState.Status.RETRIABLE_ERROR
-
-            self.update_processor_termination_time(ef_state)
-
-            ef_state.save()
-
-    def mark_processor_complete(self, *, processor_name: str, result_dict: typing.Dict):
-        with transaction.atomic():
-            ef_state = EventFlowProcessorState.objects.select_for_update().get(event_flow=self.eventflow,
-                                                                                processor_name=processor_name)
-            ef_state.result = result_dict
-            ef_state.status = EventFlowProcessorState.Status.COMPLETED
-
-            self.update_processor_termination_time(ef_state)
-
-            ef_state.save()
-        #Calling save method to trigger check for completion
-        self.eventflow.save()
-
-    def mark_processor_complete_with_error(self, *, processor_name: str, result_dict: typing.Dict, error_stacktrace):
-        with transaction.atomic():
-            ef_state = EventFlowProcessorState.objects.select_for_update().get(event_flow=self.eventflow,
-                                                                                processor_name=processor_name)
-            ef_state.result = result_dict
-            ef_state.error = error_stacktrace
-            ef_state.status = EventFlowProcessorState.Status.COMPLETED_WITH_ERROR
-
-            self.update_processor_termination_time(ef_state)
-
-            ef_state.save()
+        """Clears the result, as mark_processor_error does."""
+        self._update_incomplete_processor(
+            processor_name,
+            retriable_error=stacktrace,
+            status=EventFlowProcessorState.Status.RETRIABLE_ERROR,
+            result=None,
+        )
+
+    def mark_processor_complete(self, *, processor_name: str, result_dict: typing.Dict) -> bool:
+        """Returns False if the processor was already complete, e.g. when its task was delivered twice."""
+        newly_completed = self._update_incomplete_processor(
+            processor_name, result=result_dict, status=EventFlowProcessorState.Status.COMPLETED
+        )
+        if newly_completed:
+            self.complete_eventflow_if_processors_complete()
+        return newly_completed
+
+    def mark_processor_complete_with_error(
+        self, *, processor_name: str, result_dict: typing.Dict, error_stacktrace
+    ) -> bool:
+        """Returns False if the processor was already complete, e.g. when its task was delivered twice."""
+        return self._update_incomplete_processor(
+            processor_name,
+            result=result_dict,
+            error=error_stacktrace,
+            status=EventFlowProcessorState.Status.COMPLETED_WITH_ERROR,
+        )
 
     def delete_processors(self, processor_names:typing.List[str]):
         self.eventflow.processors.filter(processor_name__in=processor_names).delete()
@@ -134,7 +214,8 @@ class EventFlowDbHelper:
                                          status=EventFlowProcessorState.Status.PENDING,
                                          run_duration=None,
                                          start_time=None,
-                                         end_time=None
+                                         end_time=None,
+                                         llm_usage=None
                                          )
 
     def reset_all_processors_state(self, termination_processors:typing.List[str]=None):
@@ -144,5 +225,6 @@ class EventFlowDbHelper:
                                          status=EventFlowProcessorState.Status.PENDING,
                                          run_duration=None,
                                          start_time=None,
-                                         end_time=None
+                                         end_time=None,
+                                         llm_usage=None
                                          )
\ No newline at end of file
@@ -0,0 +1,30 @@
+import typing
+
+from OpenAIService.usage import summarize_llm_usage, summarize_llm_usage_by_prompt
+from evaluation.models import EventFlowProcessorState
+
+
+def get_llm_calls(processor_states) -> typing.List[typing.Dict]:
+    calls = []
+    for llm_usage in processor_states.exclude(llm_usage__isnull=True).values_list("llm_usage", flat=True):
+        calls.extend(llm_usage.get("calls", []))
+    return calls
+
+
+def get_eventflow_llm_usage(eventflow_id) -> typing.Dict:
+    """LLM usage of an eventflow, in total and by processor"""
+    processor_states = EventFlowProcessorState.objects.filter(event_flow_id=eventflow_id)
+    by_processor = {
+        processor_name: summarize_llm_usage(llm_usage.get("calls", []))
+        for processor_name, llm_usage in processor_states.exclude(llm_usage__isnull=True).values_list(
+            "processor_name", "llm_usage"
+        )
+    }
+    return {"summary": summarize_llm_usage(get_llm_calls(processor_states)), "by_processor": by_processor}
+
+
+def get_llm_usage_by_prompt(processor_states=None) -> typing.Dict[str, typing.Dict]:
+    """LLM usage of the processor states (all by default) by prompt template"""
+    if processor_states is None:
+        processor_states = EventFlowProcessorState.objects.all()
+    return summarize_llm_usage_by_prompt(get_llm_calls(processor_states))
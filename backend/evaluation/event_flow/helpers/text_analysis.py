@@ -0,0 +1,23 @@
+import typing
+
+from textblob import TextBlob
+
+
+def analyse_text(text: str) -> typing.Dict:
+    """
+    Tokenizes the text once for all the processors of an eventflow. The output is stored as the TextAnalysis
+    processor result, so it only holds json serializable values.
+    """
+    blob = TextBlob(text)
+    words = [str(word) for word in blob.words]
+    sentences = [
+        {"text": str(sentence), "word_count": len(sentence.words)}
+        for sentence in blob.sentences
+    ]
+    return {
+        "text": text,
+        "words": words,
+        "sentences": sentences,
+        "word_count": len(words),
+        "sentence_count": len(sentences),
+    }
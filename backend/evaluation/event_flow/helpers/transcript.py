@@ -0,0 +1,57 @@
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import Retry
+
+from common.caching import TwoTierCache
+
+logger = logging.getLogger(__name__)
+
+CONNECTION_TIMEOUT = 5
+TIMEOUT = 30
+MAX_RETRIES = 2
+POOL_MAXSIZE = 10
+
+# Transcripts are cached per eventflow, so all the processors of an eventflow share a single download
+_transcript_cache = TwoTierCache(namespace="transcript", maxsize=32)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_transcript_session() -> requests.Session:
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_maxsize=POOL_MAXSIZE,
+                    max_retries=Retry(
+                        total=MAX_RETRIES, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504)
+                    ),
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def fetch_transcript(*, eventflow_id: str, transcript_url: str) -> str:
+    cache_key = f"{eventflow_id}:{transcript_url}"
+    transcript = _transcript_cache.get(cache_key)
+    if transcript is not None:
+        return transcript
+
+    response = get_transcript_session().get(
+        transcript_url, allow_redirects=True, timeout=(CONNECTION_TIMEOUT, TIMEOUT)
+    )
+    if response.status_code != 200:
+        raise Exception(
+            f"Error in reading transcript. Response code = {response.status_code}. Response - {response.content}"
+        )
+    transcript = response.content.decode("utf-8")
+    _transcript_cache.set(cache_key, transcript)
+    return transcript
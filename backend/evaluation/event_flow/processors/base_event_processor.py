@@ -5,6 +5,9 @@ import typing
 
 from evaluation.models import EventFlow
 import openai
+from asgiref.sync import sync_to_async
+
+from OpenAIService.usage import collect_llm_usage, summarize_llm_usage
 
 
 from evaluation.event_flow.processors.expections import (
@@ -24,14 +27,28 @@ class EventProcessor(abc.ABC):
         raise NotImplementedError
 
     def __init__(
-        self, eventflow_id: str, inputs: typing.Dict, root_arguments: typing.Dict
+        self,
+        eventflow_id: str,
+        inputs: typing.Optional[typing.Dict] = None,
+        root_arguments: typing.Optional[typing.Dict] = None,
+        eventflow: typing.Optional[EventFlow] = None,
     ):
-        self.inputs = inputs
-        self.root_arguments = root_arguments
         self.eventflow_id = eventflow_id
 
-        # Add retry mechanism for EventFlow lookup with exponential backoff
-        self.eventflow = self._get_eventflow_with_retry(eventflow_id)
+        if eventflow is not None:
+            # Passed in when the processor is run inline by the orchestrator, which has already fetched it
+            self.eventflow = eventflow
+        else:
+            # Add retry mechanism for EventFlow lookup with exponential backoff
+            self.eventflow = self._get_eventflow_with_retry(eventflow_id)
+
+        # Inputs and root arguments are left out of slim task payloads (see SLIM_TASK_PAYLOADS)
+        if root_arguments is None:
+            root_arguments = self.eventflow.root_arguments
+        if inputs is None:
+            inputs = self.load_inputs()
+        self.inputs = inputs
+        self.root_arguments = root_arguments
         self.log_debug(f"Init function of processor called - {self.__class__.__name__}")
 
     def _get_eventflow_with_retry(
@@ -80,6 +97,15 @@ class EventProcessor(abc.ABC):
                         f"Task may have been cleaned up or there's a system issue."
                     )
 
+    def load_inputs(self) -> typing.Dict:
+        """Results of the providers of this processor, fetched in one query, as the orchestrator would send them."""
+        from evaluation.event_flow.core.compiled_dag import get_compiled_dag
+        from evaluation.event_flow.helpers.db_helper import EventFlowDbHelper
+
+        compiled_dag = get_compiled_dag(self.eventflow.type)
+        providers = compiled_dag.providers.get(self.__class__.__name__, ())
+        return compiled_dag.assemble_results(EventFlowDbHelper(self.eventflow).get_processor_results(providers))
+
     def get_formatted_msg(self, msg):
         return f"ProcessorLog:[{self.eventflow_id}]:[{self.__class__.__name__}]:{msg}"
 
@@ -109,35 +135,69 @@ class EventProcessor(abc.ABC):
 
     def execute(self):
         self.log_info(f"Execution starting.")
-        try:
-            results = self._execute()
-        except CriticalProcessorException as cpe:
+        with collect_llm_usage() as llm_calls:
+            try:
+                results = self._execute()
+            except Exception as e:
+                error = e
+            else:
+                error = None
+        self.submit_llm_usage(llm_calls)
+        if error is not None:
+            self.on_execute_error(error)
+        else:
+            self.on_execute_success(results)
+
+    async def aexecute(self):
+        """
+        Async version of execute, for processors run by the async event processor runner. DB access of the
+        outcome handlers is run with sync_to_async.
+        """
+        self.log_info(f"Execution starting.")
+        with collect_llm_usage() as llm_calls:
+            try:
+                results = await self._aexecute()
+            except Exception as e:
+                error = e
+            else:
+                error = None
+        await sync_to_async(self.submit_llm_usage)(llm_calls)
+        if error is not None:
+            await sync_to_async(self.on_execute_error)(error)
+        else:
+            await sync_to_async(self.on_execute_success)(results)
+
+    def on_execute_success(self, results: typing.Dict):
+        self.log_info(f"Processor-DONE -{self.__class__.__name__}")
+        self.submit_result(results)
+
+    def on_execute_error(self, error: Exception):
+        """Records the error of _execute. Rate limit errors are re-raised, for the caller to retry the processor."""
+        stacktrace = "".join(traceback.format_exception(error))
+        if isinstance(error, CriticalProcessorException):
             self.log_exception(
-                f"Processor {self.__class__.__name__} failed with error - {cpe.original_error_name}"
+                f"Processor {self.__class__.__name__} failed with error - {error.original_error_name}"
             )
             self.log_info(f"Processor-DONE -{self.__class__.__name__}-ERROR")
 
-            stacktrace = cpe.original_error_stack_trace
-            self.handle_critical_exception(stacktrace=stacktrace)
-        except openai.RateLimitError as e:
-            self.log_info(f"Processor got a retriable error - {e}")
-            stacktrace = traceback.format_exc()
+            self.handle_critical_exception(stacktrace=error.original_error_stack_trace)
+        elif isinstance(error, openai.RateLimitError):
+            self.log_info(f"Processor got a retriable error - {error}")
             self.submit_error(stacktrace, retriable=True)
-            raise e
-        except Exception as e:
-            self.log_exception(f"Processor failed with error - {e}")
+            raise error
+        else:
+            self.log_exception(f"Processor failed with error - {error}")
             self.log_info(f"Processor-DONE -{self.__class__.__name__}-ERROR")
 
-            stacktrace = traceback.format_exc()
             self.submit_error(stacktrace, retriable=True)
-        else:
-            self.log_info(f"Processor-DONE -{self.__class__.__name__}")
-            self.submit_result(results)
 
     @abc.abstractmethod
     def _execute(self) -> typing.Dict:
         pass
 
+    async def _aexecute(self) -> typing.Dict:
+        return await sync_to_async(self._execute)()
+
     def submit_error(self, stacktrace, retriable=False):
         from evaluation.event_flow.core.orchestrator import Orchestrator
 
@@ -167,6 +227,27 @@ class EventProcessor(abc.ABC):
             error_stacktrace=error_stacktrace,
         )
 
+    def submit_llm_usage(self, llm_calls: typing.List[typing.Dict]):
+        """Saves the usage of the LLM calls made by this run on the processor state, see OpenAIService.usage"""
+        if not llm_calls:
+            return
+        from evaluation.event_flow.helpers.db_helper import EventFlowDbHelper
+
+        try:
+            EventFlowDbHelper(self.eventflow).save_processor_llm_usage(
+                processor_name=self.__class__.__name__,
+                llm_usage={"calls": llm_calls, "summary": summarize_llm_usage(llm_calls)},
+            )
+        except Exception as e:
+            self.log_exception(f"Failed to save LLM usage - {e}")
+
+    def submit_partial_result(self, partial_result: typing.Dict):
+        from evaluation.event_flow.helpers.db_helper import EventFlowDbHelper
+
+        EventFlowDbHelper(self.eventflow).save_processor_partial_result(
+            processor_name=self.__class__.__name__, partial_result=partial_result
+        )
+
     def handle_critical_exception(self, stacktrace):
         from evaluation.event_flow.core.orchestrator import Orchestrator
 
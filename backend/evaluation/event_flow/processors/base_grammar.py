@@ -1,5 +1,4 @@
 import logging
-import requests
 
 from pydantic import BaseModel
 from textblob import TextBlob
@@ -10,6 +9,7 @@ from OpenAIService.repositories import (
 
 from evaluation.enums import QuestionType
 from evaluation.event_flow.processors.base_llm_processor import BaseLLMProcessor
+from evaluation.event_flow.processors.user_answer_mixin import UserAnswerMixin
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +24,9 @@ class Response(BaseModel):
     errors: list[Error]
 
 
-class BaseGrammar(BaseLLMProcessor):
+class BaseGrammar(UserAnswerMixin, BaseLLMProcessor):
+    stream_field = "errors"
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.prompt_template = ValidPromptTemplates.GRAMMAR_PROCESSOR
@@ -33,15 +35,8 @@ class BaseGrammar(BaseLLMProcessor):
 
     def initialize(self):
         super().initialize()
-        self.user_answer = self.root_arguments.get("text")
-        if self.user_answer is None:
-            self.transcript_url = self.inputs["SpeechToText"]["output_transcript_url"]
-            response = requests.get(self.transcript_url, allow_redirects=True)
-            if response.status_code != 200:
-                raise Exception(
-                    f"Error in reading transcript. Response code = {response.status_code}. Response - {response.content}"
-                )
-            self.user_answer = response.content.decode("utf-8")
+        self.text_analysis = self.inputs.get("TextAnalysis")
+        self.user_answer = self.get_user_answer()
 
         self.context["user_answer"] = self.user_answer
 
@@ -52,6 +47,15 @@ class BaseGrammar(BaseLLMProcessor):
                 return score
 
     def format_response(self, response: dict) -> dict:
+        return BaseGrammar.get_result(
+            response,
+            user_answer=self.user_answer,
+            text_analysis=self.text_analysis,
+            question_type=self.question_type,
+        )
+
+    @staticmethod
+    def get_result(response: dict, *, user_answer, text_analysis, question_type) -> dict:
         errors = response.get("errors")
 
         error_count = {}
@@ -66,11 +70,15 @@ class BaseGrammar(BaseLLMProcessor):
                 )
 
         total_errors = len(final_error_response)
-        blob = TextBlob(self.user_answer)
-        total_words = len(blob.words)
-        sentences = blob.sentences
+        if text_analysis is not None:
+            total_words = text_analysis["word_count"]
+            sentence_count = text_analysis["sentence_count"]
+        else:
+            blob = TextBlob(user_answer)
+            total_words = len(blob.words)
+            sentence_count = len(blob.sentences)
         average_sentence_length = (
-            total_words / len(sentences) if len(sentences) != 0 else 0
+            total_words / sentence_count if sentence_count != 0 else 0
         )
         error_density = (total_errors / total_words) * 100
 
@@ -89,7 +97,7 @@ class BaseGrammar(BaseLLMProcessor):
             },
         }
         sentence_length_score = BaseGrammar.calculate_score(
-            sentence_length_score_ranges, average_sentence_length, self.question_type
+            sentence_length_score_ranges, average_sentence_length, question_type
         )
 
         error_density_score_ranges = {
@@ -102,7 +110,7 @@ class BaseGrammar(BaseLLMProcessor):
             },
         }
         error_density_score = BaseGrammar.calculate_score(
-            error_density_score_ranges, error_density, self.question_type
+            error_density_score_ranges, error_density, question_type
         )
 
         score = 0.7 * sentence_length_score + 0.3 * error_density_score
@@ -1,15 +1,22 @@
 import json
 import logging
+import time
 from typing import Type, Dict, Any
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from pydantic import BaseModel
 from evaluation.event_flow.processors.base_event_processor import EventProcessor
 from OpenAIService.repositories import LLMCommunicationWrapper, ValidPromptTemplates
+from OpenAIService.streaming import IncrementalJSONArrayParser
 
 logger = logging.getLogger(__name__)
 
 
 class BaseLLMProcessor(EventProcessor):
+    # Top level array field of the response whose items are saved as partial results while the response streams,
+    # if LLM_STREAMING_ENABLED
+    stream_field: str | None = None
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -26,7 +33,50 @@ class BaseLLMProcessor(EventProcessor):
         if self.should_return_default_response():
             return self.format_response(self.response_format_class().dict())
 
-        output = LLMCommunicationWrapper.get_response_without_chathistory(
+        if settings.LLM_STREAMING_ENABLED and self.stream_field:
+            output = self.get_streamed_response()
+        else:
+            output = LLMCommunicationWrapper.get_response_without_chathistory(
+                self.prompt_template,
+                self.response_format_class,
+                self.context,
+                True,
+            )
+
+        logger.info(f"Output from LLM for {self.__class__.__name__}: {output}")
+
+        return self.format_response(json.loads(output))
+
+    def get_streamed_response(self) -> str:
+        """
+        Streams the response, saving the stream_field items parsed so far as the partial result of the processor,
+        at most once every LLM_STREAMING_PERSIST_INTERVAL seconds. Returns the whole response.
+        """
+        parser = IncrementalJSONArrayParser(self.stream_field)
+        items = []
+        persisted_at = None
+        for chunk in LLMCommunicationWrapper.stream_response_without_chathistory(
+            self.prompt_template,
+            self.response_format_class,
+            self.context,
+            True,
+        ):
+            new_items = parser.feed(chunk)
+            if not new_items:
+                continue
+            items.extend(new_items)
+            if persisted_at is None or time.monotonic() - persisted_at >= settings.LLM_STREAMING_PERSIST_INTERVAL:
+                self.submit_partial_result({self.stream_field: items})
+                persisted_at = time.monotonic()
+        return parser.text
+
+    async def _aexecute(self) -> dict:
+        await sync_to_async(self.initialize)()
+
+        if self.should_return_default_response():
+            return self.format_response(self.response_format_class().dict())
+
+        output = await LLMCommunicationWrapper.aget_response_without_chathistory(
             self.prompt_template,
             self.response_format_class,
             self.context,
@@ -1,5 +1,4 @@
 import logging
-import requests
 
 from pydantic import BaseModel
 
@@ -7,6 +6,7 @@ from OpenAIService.repositories import (
     ValidPromptTemplates,
 )
 from evaluation.event_flow.processors.base_llm_processor import BaseLLMProcessor
+from evaluation.event_flow.processors.user_answer_mixin import UserAnswerMixin
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +22,7 @@ class Response(BaseModel):
     Overall_Reason: str
 
 
-class Coherence(BaseLLMProcessor):
+class Coherence(UserAnswerMixin, BaseLLMProcessor):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.prompt_template = ValidPromptTemplates.COHERENCE_PROCESSOR
@@ -30,20 +30,16 @@ class Coherence(BaseLLMProcessor):
 
     def initialize(self):
         super().initialize()
-        user_answer = self.root_arguments.get("text")
-        if user_answer is None:
-            self.transcript_url = self.inputs["SpeechToText"]["output_transcript_url"]
-            response = requests.get(self.transcript_url, allow_redirects=True)
-            if response.status_code != 200:
-                raise Exception(
-                    f"Error in reading transcript. Response code = {response.status_code}. Response - {response.content}"
-                )
-            user_answer = response.content.decode("utf-8")
+        user_answer = self.get_user_answer()
         self.log_info(f"Extracted text - {user_answer}")
 
         self.context["user_answer"] = user_answer
         self.context["question"] = self.root_arguments["question"]
 
-    def format_response(self, response: dict) -> dict:
+    @staticmethod
+    def get_result(response: dict) -> dict:
         overall_score = response.get("Overall")
         return {"response": response, "score": overall_score}
+
+    def format_response(self, response: dict) -> dict:
+        return Coherence.get_result(response)
@@ -103,31 +103,36 @@ class WritingSaver(EventProcessor):
     def initialize(self):
         self.question_attemp_id = self.root_arguments.get("question_attempt_id")
 
+    @staticmethod
+    def get_eval_data(inputs):
+        """QuestionAttempt.eval_data from the results of the writing dag processors"""
         # Vocab is optional - only include if present in DAG
-        self.vocab_details = self.inputs.get("Vocab", {})
+        vocab_details = inputs.get("Vocab", {})
 
-        self.coherence_details = self.inputs["Coherence"]
+        coherence_details = inputs["Coherence"]
+
+        grammar_details = inputs["InterviewPrepGrammar"]
 
-        self.grammar_details = self.inputs["InterviewPrepGrammar"]
+        final_score = inputs["WritingFinalScore"]["final_score"]
+        grammar_score = inputs["WritingFinalScore"]["grammar"]
+        vocab_score = inputs["WritingFinalScore"]["vocab"]
+        coherence_score = inputs["WritingFinalScore"]["coherence"]
 
-        self.final_score = self.inputs["WritingFinalScore"]["final_score"]
-        self.grammar_score = self.inputs["WritingFinalScore"]["grammar"]
-        self.vocab_score = self.inputs["WritingFinalScore"]["vocab"]
-        self.coherence_score = self.inputs["WritingFinalScore"]["coherence"]
+        return {
+            "final_score": final_score,
+            "vocab": {"score": vocab_score, "details": vocab_details},
+            "coherence": {
+                "score": coherence_score,
+                "details": coherence_details,
+            },
+            "grammar": {"score": grammar_score, "details": grammar_details},
+        }
 
     def _execute(self):
         self.initialize()
         eval_object = QuestionAttempt.objects.get(id=self.question_attemp_id)
 
-        eval_data = {
-            "final_score": self.final_score,
-            "vocab": {"score": self.vocab_score, "details": self.vocab_details},
-            "coherence": {
-                "score": self.coherence_score,
-                "details": self.coherence_details,
-            },
-            "grammar": {"score": self.grammar_score, "details": self.grammar_details},
-        }
+        eval_data = WritingSaver.get_eval_data(self.inputs)
         eval_object.eval_data = eval_data
         eval_object.status = QuestionAttempt.Status.EVALUATED
 
@@ -0,0 +1,43 @@
+import logging
+
+from pydantic import BaseModel
+
+from OpenAIService.repositories import (
+    ValidPromptTemplates,
+)
+from evaluation.enums import QuestionType
+from evaluation.event_flow.processors.base_grammar import BaseGrammar, Response as GrammarResponse
+from evaluation.event_flow.processors.coherence import Coherence, Response as CoherenceResponse
+
+logger = logging.getLogger(__name__)
+
+
+class Response(BaseModel):
+    grammar: GrammarResponse
+    coherence: CoherenceResponse
+
+
+class GrammarCoherence(BaseGrammar):
+    """
+    Interview prep grammar and coherence evaluation of the answer in a single LLM call. The result has the
+    outputs of InterviewPrepGrammar and Coherence under their names, for the dag to provide them to dependents.
+    """
+
+    # Grammar errors are nested in the response, not a top level field
+    stream_field = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prompt_template = ValidPromptTemplates.GRAMMAR_COHERENCE_PROCESSOR
+        self.response_format_class = Response
+        self.question_type = QuestionType.INTERVIEW_PREP
+
+    def initialize(self):
+        super().initialize()
+        self.context["question"] = self.root_arguments["question"]
+
+    def format_response(self, response: dict) -> dict:
+        return {
+            "InterviewPrepGrammar": super().format_response(response["grammar"]),
+            "Coherence": Coherence.get_result(response["coherence"]),
+        }
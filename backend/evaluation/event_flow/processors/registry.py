@@ -0,0 +1,50 @@
+import typing
+
+from evaluation.event_flow.processors.base_event_processor import EventProcessor
+
+
+def get_event_processor_class(processor_name) -> typing.Type[EventProcessor]:
+    """Processor class by name, as referenced in dag_config. Processors are imported lazily, on first use."""
+    from evaluation.event_flow.processors.vocab import Vocab
+    from evaluation.event_flow.processors.testingProcessor import TestingProcessor
+    from evaluation.event_flow.processors.db_saver_processors import (
+        CoherenceSaver,
+        VocabSaver,
+        IELTSGrammarSaver,
+        InterviewPrepGrammarSaver,
+        WritingSaver,
+    )
+    from evaluation.event_flow.processors.coherence import Coherence
+    from evaluation.event_flow.processors.grammar import Grammar
+    from evaluation.event_flow.processors.grammar_coherence import GrammarCoherence
+    from evaluation.event_flow.processors.interview_prep_grammar import (
+        InterviewPrepGrammar,
+    )
+    from evaluation.event_flow.processors.assessment_evaluator import (
+        AssessmentEvaluatorProcessor,
+    )
+    from evaluation.event_flow.processors.writing_final_score import WritingFinalScore
+
+    from evaluation.event_flow.processors.termination_processors import AbortHandler
+    from evaluation.event_flow.processors.text_analysis import TextAnalysis
+
+    processors = [
+        TextAnalysis,
+        Coherence,
+        Vocab,
+        Grammar,
+        InterviewPrepGrammar,
+        GrammarCoherence,
+        CoherenceSaver,
+        VocabSaver,
+        IELTSGrammarSaver,
+        InterviewPrepGrammarSaver,
+        AbortHandler,
+        WritingSaver,
+        WritingFinalScore,
+        AssessmentEvaluatorProcessor,
+        TestingProcessor,
+    ]
+
+    processor_name_to_processors = {p.__name__: p for p in processors}
+    return processor_name_to_processors[processor_name]
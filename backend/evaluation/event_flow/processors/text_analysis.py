@@ -0,0 +1,29 @@
+from evaluation.event_flow.core.dag_config import DAG
+from evaluation.event_flow.helpers.text_analysis import analyse_text
+from evaluation.event_flow.processors.base_event_processor import EventProcessor
+from evaluation.event_flow.processors.user_answer_mixin import UserAnswerMixin
+
+
+class TextAnalysis(UserAnswerMixin, EventProcessor):
+    """
+    Reads (or, for speech flows, downloads) and tokenizes the answer once per eventflow. Its result (text,
+    words, sentences, counts and, when the flow runs Vocab, lemmas of the words missing from the CEFR lexicon)
+    is passed to the dependent processors, so they don't re-read and re-tokenize the answer.
+    """
+
+    def initialize(self):
+        self.user_answer = self.get_user_answer()
+        self.log_info(f"Extracted text - {self.user_answer}")
+
+    def should_lemmatize(self) -> bool:
+        # Lemmas need the spaCy pipeline, which only the Vocab processor uses
+        return "Vocab" in DAG[self.eventflow.type]["processors"]
+
+    def _execute(self):
+        self.initialize()
+        text_analysis = analyse_text(self.user_answer)
+        if self.should_lemmatize():
+            from evaluation.vocab.vocab import get_unknown_word_lemmas
+
+            text_analysis["lemmas"] = get_unknown_word_lemmas(text_analysis["words"])
+        return text_analysis
@@ -0,0 +1,23 @@
+from evaluation.event_flow.helpers.transcript import fetch_transcript
+
+
+class UserAnswerMixin:
+    """
+    Resolves the answer text for processors of an EventProcessor subclass, in order of preference from
+    - the TextAnalysis provider result, which has already resolved it once for the eventflow
+    - the text root argument
+    - the transcript of the SpeechToText provider, downloaded once per eventflow
+    """
+
+    def get_user_answer(self) -> str:
+        text_analysis = self.inputs.get("TextAnalysis")
+        if text_analysis is not None:
+            return text_analysis["text"]
+
+        user_answer = self.root_arguments.get("text")
+        if user_answer is None:
+            user_answer = fetch_transcript(
+                eventflow_id=self.eventflow_id,
+                transcript_url=self.inputs["SpeechToText"]["output_transcript_url"],
+            )
+        return user_answer
@@ -1,29 +1,22 @@
-import requests
 import logging
 
 from evaluation.event_flow.processors.base_event_processor import EventProcessor
 from evaluation.event_flow.processors.expections import ProcessorException
+from evaluation.event_flow.processors.user_answer_mixin import UserAnswerMixin
 from evaluation.vocab.vocab import evaluate_vocab
 from evaluation.event_flow.services.cefr_level_service import CEFRLevelService
 
 logger = logging.getLogger(__name__)
 
 
-class Vocab(EventProcessor):
+class Vocab(UserAnswerMixin, EventProcessor):
 
     def get_fallback_result(self):
         return self._fallback_result
 
     def initialize(self):
-        self.user_answer = self.root_arguments.get("text")
-        if self.user_answer is None:
-            self.transcript_url = self.inputs["SpeechToText"]["output_transcript_url"]
-            response = requests.get(self.transcript_url, allow_redirects=True)
-            if response.status_code != 200:
-                raise Exception(
-                    f"Error in reading transcript. Response code = {response.status_code}. Response - {response.content}"
-                )
-            self.user_answer = response.content.decode("utf-8")
+        self.text_analysis = self.inputs.get("TextAnalysis")
+        self.user_answer = self.get_user_answer()
         self.log_info(f"Extracted text - {self.user_answer}")
 
     def _execute(self):
@@ -49,7 +42,7 @@ class Vocab(EventProcessor):
             words_by_level,
             average_sentence_length,
             longest_sentence_length,
-        ) = evaluate_vocab(self.user_answer)
+        ) = evaluate_vocab(self.user_answer, text_analysis=self.text_analysis)
 
         if error is not None:
             self._fallback_result = {
@@ -0,0 +1,87 @@
+import abc
+import typing
+
+import httpx
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncBaseRestService(abc.ABC):
+    """
+    Async sibling of BaseRestService, with the same request methods as coroutines, so that several external
+    calls can be in flight at once from a single worker, e.g. with asyncio.gather.
+
+    Each instance keeps pooled, keep-alive httpx clients (one with and one without retries), which are bound to
+    the event loop they were first used in. Use the service as an async context manager, or call aclose(), in
+    that same loop.
+    """
+
+    POOL_MAX_CONNECTIONS = 10
+    POOL_MAX_KEEPALIVE_CONNECTIONS = 10
+
+    @abc.abstractmethod
+    def get_base_url(self) -> str:
+        pass
+
+    @abc.abstractmethod
+    def get_base_headers(self) -> {}:
+        pass
+
+    def __init__(self, TIMEOUT=30, CONNECTION_TIMEOUT=30, MAX_RETRIES=1, **kwargs):
+        self.base_url = self.get_base_url()
+        self._timeout = kwargs.get('timeout', TIMEOUT)
+        self._connection_timeout = kwargs.get('connection_timeout', CONNECTION_TIMEOUT)
+        self._max_retries = kwargs.get('max_retries', MAX_RETRIES)
+        self._limits = httpx.Limits(
+            max_connections=kwargs.get('pool_max_connections', self.POOL_MAX_CONNECTIONS),
+            max_keepalive_connections=kwargs.get(
+                'pool_max_keepalive_connections', self.POOL_MAX_KEEPALIVE_CONNECTIONS
+            ),
+        )
+        self._clients: typing.Dict[bool, httpx.AsyncClient] = {}
+
+    def __get_client(self, use_retry=False) -> httpx.AsyncClient:
+        client = self._clients.get(use_retry)
+        if client is None:
+            # httpx retries only failed connection attempts, unlike urllib3's Retry
+            transport = httpx.AsyncHTTPTransport(
+                retries=self._max_retries if use_retry else 0, limits=self._limits
+            )
+            client = httpx.AsyncClient(
+                transport=transport,
+                timeout=httpx.Timeout(self._timeout, connect=self._connection_timeout),
+                follow_redirects=True,
+            )
+            self._clients[use_retry] = client
+        return client
+
+    async def aclose(self):
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+    async def _get_request(self, *, url, params=None, use_retry=True, custom_headers=None) -> httpx.Response:
+        custom_headers = {} if custom_headers is None else custom_headers
+        headers = {'accept': 'application/json', **self.get_base_headers()}
+        headers = {**headers, **custom_headers}
+        return await self.__get_client(use_retry=use_retry).get(url, params=params, headers=headers)
+
+    async def _post_request(self, *, url, data: typing.Dict, use_retry=True, custom_headers=None) -> httpx.Response:
+        custom_headers = {} if custom_headers is None else custom_headers
+        headers = {'content-type': 'application/json', **self.get_base_headers()}
+        headers = {**headers, **custom_headers}
+        return await self.__get_client(use_retry=use_retry).post(url, json=data, headers=headers)
+
+    async def _patch_request(self, *, url, data: typing.Dict, use_retry=True, custom_headers=None) -> httpx.Response:
+        custom_headers = {} if custom_headers is None else custom_headers
+        headers = {'content-type': 'application/json', **self.get_base_headers()}
+        headers = {**headers, **custom_headers}
+        return await self.__get_client(use_retry=use_retry).patch(url, json=data, headers=headers)
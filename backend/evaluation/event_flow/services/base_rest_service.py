@@ -1,5 +1,7 @@
 import abc
 import dataclasses
+import os
+import threading
 import typing
 from django.conf import settings
 import requests
@@ -34,6 +36,17 @@ class TimeoutHTTPAdapter(HTTPAdapter):
 #     transcript_upload_response: str
 
 class BaseRestService(abc.ABC):
+    """
+    Sessions are pooled per process and per base url (and timeout/retry settings), so connections to a service
+    are kept alive and reused across requests and service instances, instead of a new TCP+TLS handshake for
+    every request.
+    """
+
+    POOL_CONNECTIONS = 10
+    POOL_MAXSIZE = 10
+
+    _session_pool: typing.Dict[tuple, requests.Session] = {}
+    _session_pool_lock = threading.Lock()
 
     @abc.abstractmethod
     def get_base_url(self) -> str:
@@ -48,17 +61,74 @@ class BaseRestService(abc.ABC):
         self._timeout = kwargs.get('timeout', TIMEOUT)
         self._connection_timeout = kwargs.get('connection_timeout', CONNECTION_TIMEOUT)
         self.retries = Retry(total=kwargs.get('max_retries', MAX_RETRIES))
+        self._pool_connections = kwargs.get('pool_connections', self.POOL_CONNECTIONS)
+        self._pool_maxsize = kwargs.get('pool_maxsize', self.POOL_MAXSIZE)
 
-    def __get_session(self, use_retry=False):
+    def __create_session(self, use_retry):
         s = requests.Session()
+        adapter_kwargs = {
+            'timeout': (self._connection_timeout, self._timeout,),
+            'pool_connections': self._pool_connections,
+            'pool_maxsize': self._pool_maxsize,
+        }
         if use_retry:
-            adapter = TimeoutHTTPAdapter(max_retries=self.retries, timeout=(self._connection_timeout, self._timeout,))
-        else:
-            adapter = TimeoutHTTPAdapter(timeout=(self._connection_timeout, self._timeout,))
+            adapter_kwargs['max_retries'] = self.retries
+        adapter = TimeoutHTTPAdapter(**adapter_kwargs)
         s.mount('http://', adapter)
         s.mount('https://', adapter)
         return s
 
+    def __get_session(self, use_retry=False):
+        # Pid is part of the key so that forked celery workers don't share sockets of the parent's sessions
+        key = (
+            os.getpid(),
+            self.base_url,
+            use_retry,
+            self._connection_timeout,
+            self._timeout,
+            self.retries.total,
+            self._pool_connections,
+            self._pool_maxsize,
+        )
+        session = BaseRestService._session_pool.get(key)
+        if session is None:
+            with BaseRestService._session_pool_lock:
+                session = BaseRestService._session_pool.get(key)
+                if session is None:
+                    logger.info(f"Creating pooled session for {self.base_url}")
+                    session = self.__create_session(use_retry)
+                    BaseRestService._session_pool[key] = session
+        return session
+
+    @staticmethod
+    def get_session_pool_stats() -> typing.Dict[str, typing.Dict[str, int]]:
+        """
+        Connection reuse per base url of this process' pooled sessions. reused_connections is the number of
+        requests which didn't need a new connection.
+        """
+        stats = {}
+        pid = os.getpid()
+        with BaseRestService._session_pool_lock:
+            pooled_sessions = list(BaseRestService._session_pool.items())
+        for key, session in pooled_sessions:
+            if key[0] != pid:
+                continue
+            base_url_stats = stats.setdefault(
+                key[1], {"sessions": 0, "requests": 0, "connections_opened": 0, "reused_connections": 0}
+            )
+            base_url_stats["sessions"] += 1
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for pool_key in pools.keys():
+                    pool = pools[pool_key]
+                    base_url_stats["requests"] += pool.num_requests
+                    base_url_stats["connections_opened"] += pool.num_connections
+        for base_url_stats in stats.values():
+            base_url_stats["reused_connections"] = max(
+                base_url_stats["requests"] - base_url_stats["connections_opened"], 0
+            )
+        return stats
+
     def _get_request(self, *, url, params=None, use_retry=True, custom_headers=None):
         custom_headers = {} if custom_headers is None else custom_headers
         headers = {'accept': 'application/json', **self.get_base_headers()}
@@ -1,11 +1,22 @@
+import asyncio
 import json
+import typing
 
+from .async_base_rest_service import AsyncBaseRestService
 from .base_rest_service import BaseRestService
 import logging
 from django.conf import settings
+from common.caching import TwoTierCache, get_content_hash
 logger = logging.getLogger(__name__)
 
-class CEFRLevelService(BaseRestService):
+# Predictions keyed by hash of the endpoint and text, so retried/restarted eventflows and duplicate
+# submissions don't call the service again
+_cefr_level_cache = TwoTierCache(
+    namespace="cefr_level", maxsize=settings.CEFR_LEVEL_CACHE_SIZE, timeout=settings.CACHE_TTL
+)
+
+
+class CEFRLevelServiceMixin:
     # todo - move settings to settings.py
     TIMEOUT = 100
     CONNECTION_TIMEOUT = 100
@@ -20,9 +31,59 @@ class CEFRLevelService(BaseRestService):
     def get_base_url(self) -> str:
         return settings.CEFR_LEVEL_SERVICE_ENDPOINT
 
-    def cefr_level(self, *, text:str) -> str:
-        data = {"text":text}
-        response = self._post_request(url=f'{self.base_url}/predict', data=data)
+    def get_cache_key(self, text: str) -> str:
+        return get_content_hash(self.base_url, text)
+
+    @staticmethod
+    def get_cached_level(cache_key: str) -> typing.Optional[str]:
+        return _cefr_level_cache.get(cache_key)
+
+    @staticmethod
+    def set_cached_level(cache_key: str, level: typing.Optional[str]):
+        if level:
+            _cefr_level_cache.set(cache_key, level)
+
+    @staticmethod
+    def get_cache_stats() -> typing.Dict[str, int]:
+        return _cefr_level_cache.stats()
+
+    @staticmethod
+    def get_level_from_response(response) -> str:
         logger.info(f"Got result from cefr service -{response.status_code}- {response.content}")
         response_dict = json.loads(response.json())
-        return response_dict.get("level")
\ No newline at end of file
+        return response_dict.get("level")
+
+
+class CEFRLevelService(CEFRLevelServiceMixin, BaseRestService):
+
+    def cefr_level(self, *, text:str, use_cache=True) -> str:
+        cache_key = self.get_cache_key(text)
+        if use_cache:
+            level = self.get_cached_level(cache_key)
+            if level is not None:
+                return level
+        data = {"text":text}
+        response = self._post_request(url=f'{self.base_url}/predict', data=data)
+        level = self.get_level_from_response(response)
+        self.set_cached_level(cache_key, level)
+        return level
+
+
+class AsyncCEFRLevelService(CEFRLevelServiceMixin, AsyncBaseRestService):
+
+    async def cefr_level(self, *, text: str, use_cache=True) -> str:
+        # Cache reads/writes are blocking redis calls, they are short compared to the prediction request
+        cache_key = self.get_cache_key(text)
+        if use_cache:
+            level = self.get_cached_level(cache_key)
+            if level is not None:
+                return level
+        data = {"text": text}
+        response = await self._post_request(url=f'{self.base_url}/predict', data=data)
+        level = self.get_level_from_response(response)
+        self.set_cached_level(cache_key, level)
+        return level
+
+    async def cefr_levels(self, *, texts: typing.List[str], use_cache=True) -> typing.List[str]:
+        """Levels of all the texts, requested concurrently over the pooled connections."""
+        return await asyncio.gather(*(self.cefr_level(text=text, use_cache=use_cache) for text in texts))
@@ -0,0 +1,117 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from OpenAIService.batch_providers import (
+    LiteLLMBatchProvider,
+    LocalFileBatchProvider,
+    get_llm_config_responder,
+)
+from evaluation.bulk_reevaluation import (
+    REEVALUATION_TARGETS,
+    collect_reevaluation,
+    get_reevaluable_question_attempts,
+    submit_reevaluation,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-evaluates grammar and/or coherence of evaluated writing attempts through a provider batch API. "
+        "Collecting rewrites the eval_data of the question attempts and re-aggregates the scores of their "
+        "assessment attempts. Run `submit` once, then `collect` until all batches are done."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["submit", "collect"])
+        parser.add_argument(
+            "--manifest",
+            required=True,
+            help="Json file recording the submitted batches, written by submit and updated by collect",
+        )
+        parser.add_argument(
+            "--llm-config",
+            required=True,
+            help="Name of the llm config to send the requests with",
+        )
+        parser.add_argument(
+            "--provider",
+            choices=["litellm", "local"],
+            default="litellm",
+            help="litellm uses the batch API of the config's provider (OpenAI/Azure), local sends the requests "
+            "one by one when collecting, keeping batches as files in --local-dir",
+        )
+        parser.add_argument("--local-dir", help="Directory of the local provider batch files")
+        parser.add_argument(
+            "--targets",
+            nargs="+",
+            choices=list(REEVALUATION_TARGETS),
+            default=list(REEVALUATION_TARGETS),
+        )
+        parser.add_argument("--question-attempt-ids", nargs="+", type=int, help="Limit to these attempts")
+        parser.add_argument("--limit", type=int, help="Max number of attempts to submit")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Max requests per batch")
+
+    def get_provider(self, options):
+        if options["provider"] == "local":
+            if not options["local_dir"]:
+                raise CommandError("--local-dir is required with the local provider")
+            return LocalFileBatchProvider(
+                options["local_dir"], options["llm_config"], get_llm_config_responder(options["llm_config"])
+            )
+        return LiteLLMBatchProvider(options["llm_config"])
+
+    def handle(self, *args, **options):
+        provider = self.get_provider(options)
+        manifest_path = options["manifest"]
+
+        if options["action"] == "submit":
+            if os.path.exists(manifest_path):
+                raise CommandError(f"Manifest {manifest_path} already exists, collect it or use another path")
+            question_attempts = get_reevaluable_question_attempts()
+            if options["question_attempt_ids"]:
+                question_attempts = question_attempts.filter(id__in=options["question_attempt_ids"])
+            if options["limit"]:
+                question_attempts = question_attempts[:options["limit"]]
+
+            manifest = submit_reevaluation(
+                provider=provider,
+                question_attempts=question_attempts,
+                target_names=options["targets"],
+                batch_size=options["batch_size"],
+            )
+            manifest["provider"] = options["provider"]
+            manifest["llm_config"] = options["llm_config"]
+            self.write_manifest(manifest_path, manifest)
+            attempts = sum(len(batch["question_attempt_ids"]) for batch in manifest["batches"])
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"✅ Submitted {attempts} attempts in {len(manifest['batches'])} batches, manifest - {manifest_path}"
+                )
+            )
+            return
+
+        if not os.path.exists(manifest_path):
+            raise CommandError(f"Manifest {manifest_path} not found")
+        with open(manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+        counts = collect_reevaluation(provider=provider, manifest=manifest)
+        self.write_manifest(manifest_path, manifest)
+        self.stdout.write(
+            f"  - Attempts updated: {counts['attempts_updated']}\n"
+            f"  - Attempts failed: {counts['attempts_failed']}\n"
+            f"  - Assessments re-aggregated: {counts['assessments_updated']}\n"
+            f"  - Batches failed: {counts['batches_failed']}\n"
+            f"  - Batches still in progress: {counts['batches_pending']}"
+        )
+        if counts["batches_pending"]:
+            self.stdout.write(self.style.WARNING("⚠ Some batches are still in progress, run collect again later"))
+        else:
+            self.stdout.write(self.style.SUCCESS("✅ All batches collected"))
+
+    @staticmethod
+    def write_manifest(path, manifest):
+        with open(f"{path}.tmp", "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+        os.replace(f"{path}.tmp", path)
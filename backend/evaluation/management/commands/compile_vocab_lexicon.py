@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from evaluation.vocab.lexicon_store import compile_binary_lexicon
+from evaluation.vocab.vocab import get_source_word_files_digest, load_word_data
+
+
+class Command(BaseCommand):
+    help = "Compiles the CEFR word and frequency json files into the memory-mappable binary lexicon used by Vocab"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=settings.VOCAB_LEXICON_BINARY_PATH,
+            help="Path of the compiled lexicon file. Defaults to VOCAB_LEXICON_BINARY_PATH.",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Compiling CEFR lexicon...")
+        most_freq_5000, most_freq_2000, word_level_mapping = load_word_data()
+        entries = compile_binary_lexicon(
+            output_path=options["output"],
+            most_freq_5000=most_freq_5000,
+            most_freq_2000=most_freq_2000,
+            word_level_mapping=word_level_mapping,
+            source_digest=get_source_word_files_digest(),
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ Compiled {entries} entries to {options['output']}")
+        )
@@ -0,0 +1,47 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from evaluation.event_flow.helpers.llm_usage import get_eventflow_llm_usage, get_llm_usage_by_prompt
+from evaluation.models import EventFlowProcessorState
+
+
+class Command(BaseCommand):
+    help = "Reports LLM token usage and latency by prompt template, or for a single eventflow"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--eventflow-id", help="Report the usage of this eventflow by processor")
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=7,
+            help="Report the usage of processors which ended in the last given days (default 7)",
+        )
+
+    def handle(self, *args, **options):
+        if options["eventflow_id"]:
+            usage = get_eventflow_llm_usage(options["eventflow_id"])
+            self.stdout.write(f"Eventflow {options['eventflow_id']}")
+            self.write_usage("Total", usage["summary"])
+            for processor_name, summary in usage["by_processor"].items():
+                self.write_usage(processor_name, summary)
+            return
+
+        processor_states = EventFlowProcessorState.objects.filter(
+            end_time__gte=timezone.now() - timedelta(days=options["days"])
+        )
+        usage_by_prompt = get_llm_usage_by_prompt(processor_states)
+        self.stdout.write(f"LLM usage of the last {options['days']} days by prompt, most tokens first")
+        for prompt_name, summary in sorted(
+            usage_by_prompt.items(), key=lambda item: item[1]["total_tokens"], reverse=True
+        ):
+            self.write_usage(prompt_name, summary)
+
+    def write_usage(self, name, summary):
+        average_latency = summary["latency"] / summary["calls"] if summary["calls"] else 0
+        self.stdout.write(
+            f"  - {name}: {summary['calls']} calls, {summary['cache_hits']} cache hits, "
+            f"{summary['prompt_tokens']} prompt + {summary['completion_tokens']} completion tokens, "
+            f"{average_latency:.2f}s average latency, {summary['retries']} retries"
+        )
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.18 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evaluation', '0003_remove_assessmentattempt_last_saved_section_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventflowprocessorstate',
+            name='llm_usage',
+            field=models.JSONField(blank=True, help_text='Tokens, latency, model and cache hits of the LLM calls made by the last run of the processor', null=True),
+        ),
+    ]
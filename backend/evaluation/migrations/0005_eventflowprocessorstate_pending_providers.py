@@ -0,0 +1,18 @@
+# Generated by Django 4.2.18 on 2026-10-18 14:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evaluation', '0004_eventflowprocessorstate_llm_usage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventflowprocessorstate',
+            name='pending_providers',
+            field=models.IntegerField(blank=True, help_text="Number of providers of the processor which haven't completed yet, the processor is called when it reaches 0.", null=True),
+        ),
+    ]
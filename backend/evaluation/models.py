@@ -194,6 +194,20 @@ class EventFlowProcessorState(models.Model):
 
     end_time = models.DateTimeField("Start time of event flow", null=True, blank=True)
 
+    llm_usage = models.JSONField(
+        null=True,
+        blank=True,
+        help_text=_("Tokens, latency, model and cache hits of the LLM calls made by the last run of the processor"),
+    )
+
+    pending_providers = models.IntegerField(
+        null=True,
+        blank=True,
+        help_text=_(
+            "Number of providers of the processor which haven't completed yet, the processor is called when it reaches 0."
+        ),
+    )
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
@@ -1,13 +1,14 @@
+import asyncio
 import logging
 import time
 
+from asgiref.sync import async_to_sync, sync_to_async
+
 from celery import shared_task
+from django.conf import settings
 
 from evaluation.event_flow.processors.base_event_processor import EventProcessor
-from evaluation.event_flow.processors.assessment_evaluator import (
-    AssessmentEvaluatorProcessor,
-)
-from evaluation.event_flow.processors.writing_final_score import WritingFinalScore
+from evaluation.event_flow.processors.registry import get_event_processor_class
 from evaluation.repositories import AssessmentAttemptRepository
 from evaluation.models import AssessmentAttempt
 import openai
@@ -22,50 +23,21 @@ def add(*, x, y):
     return x + y
 
 
-@shared_task(bind=True, max_retries=5, queue="evaluation_queue")
-def call_event_processor(self, *, eventflow_id, processor_name, inputs, root_arguments):
-
-    from evaluation.event_flow.processors.vocab import Vocab
-    from evaluation.event_flow.processors.testingProcessor import TestingProcessor
-    from evaluation.event_flow.processors.db_saver_processors import (
-        CoherenceSaver,
-        VocabSaver,
-        IELTSGrammarSaver,
-        InterviewPrepGrammarSaver,
-        WritingSaver,
-    )
-    from evaluation.event_flow.processors.coherence import Coherence
-    from evaluation.event_flow.processors.grammar import Grammar
-    from evaluation.event_flow.processors.interview_prep_grammar import (
-        InterviewPrepGrammar,
-    )
+def get_rate_limit_retry_delay(retries):
+    default_retry_delay = 10
+    max_retry_delay = 600
+    return min(default_retry_delay * (2**retries), max_retry_delay)
 
-    from evaluation.event_flow.processors.termination_processors import AbortHandler
 
+@shared_task(bind=True, max_retries=5, queue="evaluation_queue")
+def call_event_processor(self, *, eventflow_id, processor_name, inputs=None, root_arguments=None):
     logger.info(f"🔍🔍🔍 call_event_processor() STARTED 🔍🔍🔍")
     logger.info(f"🔍🔍🔍 processor_name: {processor_name} 🔍🔍🔍")
     logger.info(f"🔍🔍🔍 inputs: {inputs} 🔍🔍🔍")
     logger.info(f"🔍🔍🔍 root_arguments: {root_arguments} 🔍🔍🔍")
     logger.info(f"Task {self.__dict__}")
     logger.info(f"🔍🔍🔍 Task {self.__dict__} 🔍🔍🔍")
-    processors = [
-        Coherence,
-        Vocab,
-        Grammar,
-        InterviewPrepGrammar,
-        CoherenceSaver,
-        VocabSaver,
-        IELTSGrammarSaver,
-        InterviewPrepGrammarSaver,
-        AbortHandler,
-        WritingSaver,
-        WritingFinalScore,
-        AssessmentEvaluatorProcessor,
-        TestingProcessor,
-    ]
-
-    processor_name_to_processors = {p.__name__: p for p in processors}
-    processor_instance: EventProcessor = processor_name_to_processors[processor_name]
+    processor_instance: EventProcessor = get_event_processor_class(processor_name)
     try:
         logger.info(f"Celery calling processor class - {processor_instance}.")
         processor_instance(
@@ -73,11 +45,7 @@ def call_event_processor(self, *, eventflow_id, processor_name, inputs, root_arg
         ).execute()
     except openai.RateLimitError as exc:
         # Doing manual retry than celery decorator because that is showing
-        default_retry_delay = 10
-        max_retry_delay = 600
-        retry_delay = min(
-            default_retry_delay * (2**self.request.retries), max_retry_delay
-        )
+        retry_delay = get_rate_limit_retry_delay(self.request.retries)
         # Log the retry status
         logger.info(
             f"{self.request.__dict__}, [{processor_name}-celery_task]: Retry #{self.request.retries + 1} in {retry_delay} seconds."
@@ -86,6 +54,54 @@ def call_event_processor(self, *, eventflow_id, processor_name, inputs, root_arg
         self.retry(exc=exc, countdown=retry_delay)
 
 
+async def run_event_processors_concurrently(processor_calls):
+    """
+    Runs the processors with aexecute, so their LLM requests are in flight together. At most
+    ASYNC_LLM_PROCESSOR_CONCURRENCY processors run at a time. Processors which hit a rate limit are retried
+    individually with call_event_processor.
+    """
+    semaphore = asyncio.Semaphore(settings.ASYNC_LLM_PROCESSOR_CONCURRENCY)
+
+    async def run_event_processor(processor_call):
+        async with semaphore:
+            processor_class = get_event_processor_class(processor_call["processor_name"])
+            try:
+                processor = await sync_to_async(processor_class)(
+                    eventflow_id=processor_call["eventflow_id"],
+                    inputs=processor_call.get("inputs"),
+                    root_arguments=processor_call.get("root_arguments"),
+                )
+                await processor.aexecute()
+            except openai.RateLimitError:
+                retry_delay = get_rate_limit_retry_delay(0)
+                logger.info(
+                    f"[{processor_call['processor_name']}-async_runner]: Rate limited, retrying with "
+                    f"call_event_processor in {retry_delay} seconds."
+                )
+                call_event_processor.apply_async(
+                    kwargs=processor_call, countdown=retry_delay, queue="evaluation_queue"
+                )
+            except Exception as e:
+                logger.exception(
+                    f"[{processor_call['processor_name']}-async_runner]: Failed to run processor for eventflow "
+                    f"{processor_call['eventflow_id']} - {e}"
+                )
+
+    await asyncio.gather(*(run_event_processor(processor_call) for processor_call in processor_calls))
+
+
+@shared_task(queue="evaluation_queue")
+def call_event_processors_async(*, processor_calls):
+    """
+    Runs several (LLM bound) processors concurrently in this worker. processor_calls is a list of
+    call_event_processor kwargs.
+    """
+    logger.info(
+        f"call_event_processors_async() STARTED for {[call['processor_name'] for call in processor_calls]}"
+    )
+    async_to_sync(run_event_processors_concurrently)(processor_calls)
+
+
 @shared_task(queue="evaluation_queue")
 def mark_test_abandoned(assessment_id):
     try:
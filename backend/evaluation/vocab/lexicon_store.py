@@ -0,0 +1,138 @@
+import hashlib
+import mmap
+import os
+import struct
+import typing
+
+
+LEVELS = ('A1', 'A2', 'B1', 'B2', 'C1', 'C2')
+_LEVEL_TO_CODE = {level: code for code, level in enumerate(LEVELS, start=1)}
+_LEVEL_MASK = 0b0000_0111
+_MOST_FREQ_2000_FLAG = 0b0000_1000
+_MOST_FREQ_5000_FLAG = 0b0001_0000
+
+# Header - magic, number of entries, size of the string table, sha256 digest of the source json files
+_MAGIC = b'CEFRLEX2'
+_HEADER = struct.Struct('<8sII32s')
+_OFFSET = struct.Struct('<I')
+
+
+class JsonLexiconStore:
+    """Lexicon lookups backed by the dicts/sets parsed from the vocab json files."""
+
+    def __init__(self, most_freq_5000, most_freq_2000, word_level_mapping):
+        self.most_freq_5000 = frozenset(most_freq_5000)
+        self.most_freq_2000 = frozenset(most_freq_2000)
+        self.word_level_mapping = word_level_mapping
+
+    def get_level(self, key: str) -> typing.Optional[str]:
+        cefr_word = self.word_level_mapping.get(key)
+        if cefr_word and cefr_word.get("cefr") in _LEVEL_TO_CODE:
+            return cefr_word.get("cefr")
+        return None
+
+    def is_most_freq_2000(self, key: str) -> bool:
+        return key in self.most_freq_2000
+
+    def is_most_freq_5000(self, key: str) -> bool:
+        return key in self.most_freq_5000
+
+
+class BinaryLexiconStore:
+    """
+    Lexicon lookups backed by a file written by compile_binary_lexicon, laid out as
+
+        header | (n + 1) uint32 string offsets | n flag bytes | sorted utf-8 string table
+
+    where each flag byte holds the CEFR level code and the frequency list memberships of the word. The file is
+    memory mapped read-only, so all worker processes on a host share the same pages through the page cache, and
+    words are looked up with a binary search over the string table.
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as lexicon_file:
+            self._mmap = mmap.mmap(lexicon_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mmap) < _HEADER.size:
+            self._mmap.close()
+            raise ValueError(f"{path} is truncated or corrupt")
+        magic, self._count, strings_size, self.source_digest = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a compiled CEFR lexicon")
+
+        self._offsets_start = _HEADER.size
+        self._flags_start = self._offsets_start + (self._count + 1) * _OFFSET.size
+        self._strings_start = self._flags_start + self._count
+        if len(self._mmap) != self._strings_start + strings_size:
+            self._mmap.close()
+            raise ValueError(f"{path} is truncated or corrupt")
+
+    def _get_key(self, index: int) -> bytes:
+        start, end = struct.unpack_from('<II', self._mmap, self._offsets_start + index * _OFFSET.size)
+        return self._mmap[self._strings_start + start:self._strings_start + end]
+
+    def _get_flags(self, key: str) -> int:
+        encoded_key = key.encode('utf-8')
+        low, high = 0, self._count
+        while low < high:
+            mid = (low + high) // 2
+            mid_key = self._get_key(mid)
+            if mid_key < encoded_key:
+                low = mid + 1
+            elif mid_key > encoded_key:
+                high = mid
+            else:
+                return self._mmap[self._flags_start + mid]
+        return 0
+
+    def get_level(self, key: str) -> typing.Optional[str]:
+        level_code = self._get_flags(key) & _LEVEL_MASK
+        return LEVELS[level_code - 1] if level_code else None
+
+    def is_most_freq_2000(self, key: str) -> bool:
+        return bool(self._get_flags(key) & _MOST_FREQ_2000_FLAG)
+
+    def is_most_freq_5000(self, key: str) -> bool:
+        return bool(self._get_flags(key) & _MOST_FREQ_5000_FLAG)
+
+
+def get_source_digest(source_paths: typing.Sequence[str]) -> bytes:
+    """sha256 digest of the contents of the source files, in order."""
+    digest = hashlib.sha256()
+    for path in source_paths:
+        with open(path, 'rb') as source_file:
+            digest.update(hashlib.sha256(source_file.read()).digest())
+    return digest.digest()
+
+
+def compile_binary_lexicon(
+    *, output_path: str, most_freq_5000, most_freq_2000, word_level_mapping, source_digest: bytes
+) -> int:
+    """
+    Writes the binary lexicon for BinaryLexiconStore and returns the number of entries written.
+    The file is written next to output_path and then moved in place, so processes which already mapped an older
+    version keep reading a consistent file.
+    """
+    flags_by_key = {}
+    for key, cefr_word in word_level_mapping.items():
+        flags_by_key[key] = _LEVEL_TO_CODE.get((cefr_word or {}).get("cefr"), 0)
+    for key in most_freq_2000:
+        flags_by_key[key] = flags_by_key.get(key, 0) | _MOST_FREQ_2000_FLAG
+    for key in most_freq_5000:
+        flags_by_key[key] = flags_by_key.get(key, 0) | _MOST_FREQ_5000_FLAG
+
+    encoded_keys = sorted((key.encode('utf-8'), flags) for key, flags in flags_by_key.items())
+
+    offsets = [0]
+    for encoded_key, _ in encoded_keys:
+        offsets.append(offsets[-1] + len(encoded_key))
+
+    temp_path = f"{output_path}.tmp"
+    with open(temp_path, 'wb') as lexicon_file:
+        lexicon_file.write(_HEADER.pack(_MAGIC, len(encoded_keys), offsets[-1], source_digest))
+        lexicon_file.write(struct.pack(f'<{len(offsets)}I', *offsets))
+        lexicon_file.write(bytes(flags for _, flags in encoded_keys))
+        lexicon_file.write(b''.join(encoded_key for encoded_key, _ in encoded_keys))
+    os.replace(temp_path, output_path)
+    return len(encoded_keys)
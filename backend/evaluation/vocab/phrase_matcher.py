@@ -0,0 +1,145 @@
+import re
+import typing
+from collections import deque
+
+
+class AhoCorasickAutomaton:
+    """
+    Multi-pattern substring matcher. All keywords are found in a single pass over the text, instead of
+    one scan per keyword.
+    """
+
+    def __init__(self, keywords: typing.Iterable[str]):
+        self._goto: typing.List[typing.Dict[str, int]] = [{}]
+        self._fail: typing.List[int] = [0]
+        self._output: typing.List[typing.List[int]] = [[]]
+
+        for keyword_index, keyword in enumerate(keywords):
+            self._add_keyword(keyword_index, keyword)
+        self._build_failure_links()
+
+    def _add_keyword(self, keyword_index: int, keyword: str):
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state].append(keyword_index)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail_state = self._fail[state]
+                while fail_state and char not in self._goto[fail_state]:
+                    fail_state = self._fail[fail_state]
+                self._fail[next_state] = self._goto[fail_state].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find_keywords(self, text: str) -> typing.Set[int]:
+        """Returns indexes of all the keywords occurring in the text."""
+        found = set()
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+class CEFRPhraseMatcher:
+    """
+    Finds the CEFR phrases (regex patterns from cefrPhrases.json) present in a text.
+
+    For every pattern, the longest literal run that any match must contain is used as its anchor. The anchors
+    are matched together with an Aho-Corasick automaton, and only patterns whose anchor is present are verified
+    with their (precompiled) regex. Results are the same as running re.search(phrase, text, re.IGNORECASE) for
+    every phrase, in the order of the phrase mapping.
+    """
+
+    _UNSUPPORTED_SYNTAX = set("|()[]{}^$")
+    _QUANTIFIERS = set("?*+")
+
+    def __init__(self, phrase_level_mapping: typing.Dict[str, typing.Dict]):
+        self._patterns = []
+        self._always_checked = set()
+        anchors = []
+        anchor_pattern_indexes = []
+
+        for pattern_index, (phrase, phrase_data) in enumerate(phrase_level_mapping.items()):
+            self._patterns.append((re.compile(phrase, re.IGNORECASE), phrase_data["cefr"]))
+            anchor = self.get_anchor(phrase)
+            if anchor:
+                anchors.append(anchor.casefold())
+                anchor_pattern_indexes.append(pattern_index)
+            else:
+                self._always_checked.add(pattern_index)
+
+        self._anchor_pattern_indexes = anchor_pattern_indexes
+        self._automaton = AhoCorasickAutomaton(anchors)
+
+    @classmethod
+    def get_anchor(cls, phrase: str) -> str:
+        """
+        Returns the longest literal substring that every match of the regex phrase must contain, or an empty string
+        if the phrase uses syntax which isn't understood here (such phrases are always checked with the regex).
+        """
+        if cls._UNSUPPORTED_SYNTAX.intersection(phrase):
+            return ""
+
+        runs = []
+        current = []
+        i = 0
+        while i < len(phrase):
+            char = phrase[i]
+            next_char = phrase[i + 1] if i + 1 < len(phrase) else ""
+            if char == "\\" or char == ".":
+                # Escapes (\w, \s, ...) and wildcards are not literals, skip them along with their quantifier
+                i += 2 if char == "\\" else 1
+                if i < len(phrase) and phrase[i] in cls._QUANTIFIERS:
+                    i += 1
+                runs.append("".join(current))
+                current = []
+                continue
+            if char in cls._QUANTIFIERS:
+                # A quantifier not following a literal, e.g. at the start of the phrase
+                return ""
+            if next_char in ("?", "*"):
+                # Optional literal, breaks the run
+                runs.append("".join(current))
+                current = []
+                i += 2
+                continue
+            current.append(char)
+            if next_char == "+":
+                runs.append("".join(current))
+                current = []
+                i += 2
+                continue
+            i += 1
+        runs.append("".join(current))
+        return max(runs, key=len)
+
+    def find_phrases(self, text: str) -> typing.List[typing.Tuple[str, str]]:
+        """Returns (matched text, cefr level) for every phrase found in the text."""
+        candidate_indexes = set(self._always_checked)
+        for anchor_index in self._automaton.find_keywords(text.casefold()):
+            candidate_indexes.add(self._anchor_pattern_indexes[anchor_index])
+
+        found = []
+        for pattern_index in sorted(candidate_indexes):
+            pattern, level = self._patterns[pattern_index]
+            match = pattern.search(text)
+            if match:
+                found.append((match.group(0), level))
+        return found
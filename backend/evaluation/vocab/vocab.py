@@ -1,82 +1,279 @@
-from textblob import TextBlob
+from pathlib import Path
+from django.conf import settings
 import json
-import re
+import logging
+import os
+import threading
+import typing
 import spacy
 
+from common.caching import TwoTierCache
+from evaluation.event_flow.helpers.text_analysis import analyse_text
+from evaluation.vocab.lexicon_store import (
+    BinaryLexiconStore,
+    JsonLexiconStore,
+    get_source_digest,
+)
+from evaluation.vocab.phrase_matcher import CEFRPhraseMatcher
 
-def init():
-    with open('evaluation/vocab/most_freq_5000.json', 'r') as json_file:
+
+logger = logging.getLogger(__name__)
+
+VOCAB_DATA_DIR = Path(__file__).resolve().parent
+DEFAULT_LEMMATIZATION_BATCH_SIZE = 64
+SOURCE_WORD_FILES = ('cefrWords.json', 'most_freq_2000.json', 'most_freq_5000.json')
+
+
+def load_word_data():
+    with open(VOCAB_DATA_DIR / 'most_freq_5000.json', 'r') as json_file:
         most_freq_5000 = json.load(json_file)
-    with open('evaluation/vocab/most_freq_2000.json', 'r') as json_file:
+    with open(VOCAB_DATA_DIR / 'most_freq_2000.json', 'r') as json_file:
         most_freq_2000 = json.load(json_file)
 
-    with open('evaluation/vocab/cefrWords.json', 'r') as json_file:
+    with open(VOCAB_DATA_DIR / 'cefrWords.json', 'r') as json_file:
         word_level_mapping = json.load(json_file)
-        
-    with open('evaluation/vocab/cefrPhrases.json', 'r') as json_file:
-        phrase_level_mapping = json.load(json_file)
-        
-    return most_freq_5000, most_freq_2000, word_level_mapping, phrase_level_mapping
-
-def evaluate_vocab(user_answer):
-    most_freq_5000, most_freq_2000, word_level_mapping, phrase_level_mapping = init()
-    blob = TextBlob(user_answer)
-
-    total_words = len(blob.words)
-    unique_words = set(blob.words)
-    num_unique_words = len(unique_words)
-
-    num_repeated_words = total_words - num_unique_words
-
-    percentage_unique = (num_unique_words / total_words) * 100
-    lowercase_unique_words = {word.lower() for word in unique_words}
-
-    common_words = lowercase_unique_words.intersection(most_freq_5000)
-    frequently_used_2000 = len(lowercase_unique_words.intersection(most_freq_2000))
-
-    rare_words = num_unique_words - len(common_words)
-    percentage_rare_words = (rare_words / num_unique_words) * 100
-    percentage_frequently_used_2000 = (frequently_used_2000/num_unique_words) * 100
-    level_counts = {}
-    words_by_level = {}
-
-    words_not_found = ""
-    existing_levels = {'A2', 'B1', 'C2', 'C1', 'A1', 'B2'}
-    for word in unique_words:
-        cefr_word = word_level_mapping.get(word.lower())
-        if cefr_word and cefr_word.get("cefr") in existing_levels:
-            level = cefr_word.get("cefr")
-            level_counts[level] = level_counts.get(level, 0) + 1
-            if level not in words_by_level:
-                words_by_level[level] = []
-            words_by_level[level].append(word)
-        else:
-            words_not_found += word + " "   
-    nlp = spacy.load('en_core_web_sm')
-    doc = nlp(words_not_found)         
-    lemmatized_words = [token.lemma_ for token in doc]
-    for word in lemmatized_words:
-        cefr_word = word_level_mapping.get(word.lower())
-        if cefr_word and cefr_word.get("cefr") in existing_levels:
-            level = cefr_word.get("cefr")
-            level_counts[level] = level_counts.get(level, 0) + 1
-            if level not in words_by_level:
-                words_by_level[level] = []
-            words_by_level[level].append(word)
-
-    sentences = blob.sentences
-    sentence_lengths = [len(sentence.words) for sentence in sentences]
-    average_sentence_length = sum(sentence_lengths) / len(sentences)
-
-    longest_sentence_length = max(sentence_lengths)
-
-    for phrase in phrase_level_mapping:
-        match = re.search(phrase, user_answer, re.IGNORECASE)
-        if match:
-            exact_phrase = match.group(0)
-            level = phrase_level_mapping[phrase]['cefr']
-            level_counts[level] = level_counts.get(level, 0) + 1
-            if level not in words_by_level:
-                words_by_level[level] = []
-            words_by_level[level].append(exact_phrase)
-    return num_unique_words, num_repeated_words, total_words, frequently_used_2000, percentage_frequently_used_2000, percentage_unique, rare_words, percentage_rare_words, level_counts, words_by_level, average_sentence_length, longest_sentence_length
+
+    return most_freq_5000, most_freq_2000, word_level_mapping
+
+
+def load_phrase_level_mapping():
+    with open(VOCAB_DATA_DIR / 'cefrPhrases.json', 'r') as json_file:
+        return json.load(json_file)
+
+
+def init():
+    most_freq_5000, most_freq_2000, word_level_mapping = load_word_data()
+    return most_freq_5000, most_freq_2000, word_level_mapping, load_phrase_level_mapping()
+
+
+def get_source_word_files_digest():
+    return get_source_digest([VOCAB_DATA_DIR / file_name for file_name in SOURCE_WORD_FILES])
+
+
+def load_lexicon_store():
+    """
+    Returns the binary lexicon store compiled by the compile_vocab_lexicon command, if it is present, readable and
+    was compiled from the current json files, else falls back to parsing the json files.
+    """
+    binary_path = settings.VOCAB_LEXICON_BINARY_PATH
+    if os.path.exists(binary_path):
+        try:
+            store = BinaryLexiconStore(binary_path)
+        except ValueError as e:
+            logger.error(f"Can't read compiled CEFR lexicon, run the compile_vocab_lexicon command. Using json files. {e}")
+            return JsonLexiconStore(*load_word_data())
+        if store.source_digest == get_source_word_files_digest():
+            logger.info(f"Using compiled CEFR lexicon from {binary_path}")
+            return store
+        logger.warning(
+            f"Compiled CEFR lexicon {binary_path} is stale, run the compile_vocab_lexicon command. Using json files."
+        )
+    else:
+        logger.info(f"Compiled CEFR lexicon not found at {binary_path}, using json files.")
+    return JsonLexiconStore(*load_word_data())
+
+
+class CEFRLexicon:
+    """
+    CEFR word lexicon, phrase matcher, frequency lists and spaCy pipeline used by evaluate_vocab.
+    Loading all of these takes seconds, so a single instance is kept per process (see get_lexicon).
+    """
+
+    SPACY_MODEL = 'en_core_web_sm'
+    # Only POS tags are needed for lemmatization, dependency parsing and NER are wasted work
+    SPACY_DISABLED_COMPONENTS = ['parser', 'ner']
+
+    def __init__(self):
+        self.store = load_lexicon_store()
+        self.phrase_matcher = CEFRPhraseMatcher(load_phrase_level_mapping())
+        self.nlp = spacy.load(self.SPACY_MODEL, disable=self.SPACY_DISABLED_COMPONENTS)
+        # Lemmas depend on the model, so the model version is part of the shared cache namespace
+        self.lemma_cache = TwoTierCache(
+            namespace=f"vocab_lemma:{self.SPACY_MODEL}:{self.nlp.meta.get('version')}",
+            maxsize=settings.VOCAB_LEMMA_CACHE_SIZE,
+            timeout=settings.VOCAB_LEMMA_CACHE_TTL,
+            use_shared_cache=settings.VOCAB_LEMMA_CACHE_USE_REDIS,
+        )
+
+    def get_word_level(self, word):
+        return self.store.get_level(word.lower())
+
+
+_lexicon = None
+_lexicon_lock = threading.Lock()
+
+
+def get_lexicon() -> CEFRLexicon:
+    global _lexicon
+    if _lexicon is None:
+        with _lexicon_lock:
+            if _lexicon is None:
+                logger.info("Loading CEFR lexicon")
+                _lexicon = CEFRLexicon()
+    return _lexicon
+
+
+class VocabAnalysis:
+    """
+    Vocab stats of a single text. Words not found in the lexicon need to be lemmatized with spaCy before the
+    result is complete, which is done separately so that texts can be lemmatized in batches.
+    text_analysis is the output of analyse_text for the text, computed here if not passed.
+    """
+
+    def __init__(self, lexicon: CEFRLexicon, user_answer: str, text_analysis: typing.Optional[typing.Dict] = None):
+        self.lexicon = lexicon
+        self.user_answer = user_answer
+        if text_analysis is None:
+            text_analysis = analyse_text(user_answer)
+        words = text_analysis["words"]
+        self.sentence_lengths = [sentence["word_count"] for sentence in text_analysis["sentences"]]
+        self.known_lemmas = text_analysis.get("lemmas") or {}
+
+        self.total_words = len(words)
+        unique_words = set(words)
+        self.num_unique_words = len(unique_words)
+
+        self.num_repeated_words = self.total_words - self.num_unique_words
+
+        self.percentage_unique = (self.num_unique_words / self.total_words) * 100
+        lowercase_unique_words = {word.lower() for word in unique_words}
+
+        common_words = sum(1 for word in lowercase_unique_words if lexicon.store.is_most_freq_5000(word))
+        self.frequently_used_2000 = sum(1 for word in lowercase_unique_words if lexicon.store.is_most_freq_2000(word))
+
+        self.rare_words = self.num_unique_words - common_words
+        self.percentage_rare_words = (self.rare_words / self.num_unique_words) * 100
+        self.percentage_frequently_used_2000 = (self.frequently_used_2000/self.num_unique_words) * 100
+        self.level_counts = {}
+        self.words_by_level = {}
+
+        self.words_not_found = []
+        for word in unique_words:
+            if not self._add_word(word):
+                self.words_not_found.append(word)
+
+    def _add_word(self, word) -> bool:
+        level = self.lexicon.get_word_level(word)
+        if level:
+            self._add_to_level(level, word)
+        return level is not None
+
+    def _add_to_level(self, level, word):
+        self.level_counts[level] = self.level_counts.get(level, 0) + 1
+        if level not in self.words_by_level:
+            self.words_by_level[level] = []
+        self.words_by_level[level].append(word)
+
+    def add_lemmatized_words(self, lemmatized_words):
+        for word in lemmatized_words:
+            self._add_word(word)
+
+    def get_result(self):
+        sentence_lengths = self.sentence_lengths
+        average_sentence_length = sum(sentence_lengths) / len(sentence_lengths)
+
+        longest_sentence_length = max(sentence_lengths)
+
+        for exact_phrase, level in self.lexicon.phrase_matcher.find_phrases(self.user_answer):
+            self._add_to_level(level, exact_phrase)
+        return self.num_unique_words, self.num_repeated_words, self.total_words, self.frequently_used_2000, self.percentage_frequently_used_2000, self.percentage_unique, self.rare_words, self.percentage_rare_words, self.level_counts, self.words_by_level, average_sentence_length, longest_sentence_length
+
+
+def get_lemmas_by_word(doc, words):
+    """
+    Maps the tokens of a doc made by joining words with spaces back to the words, a word can have multiple
+    tokens, e.g. "can't".
+    """
+    word_end_offsets = []
+    offset = 0
+    for word in words:
+        offset += len(word)
+        word_end_offsets.append(offset)
+        offset += 1
+
+    lemmas_by_word = {word: [] for word in words}
+    word_index = 0
+    for token in doc:
+        while token.idx >= word_end_offsets[word_index]:
+            word_index += 1
+        lemmas_by_word[words[word_index]].append(token.lemma_)
+    return lemmas_by_word
+
+
+def lemmatize_words(lexicon: CEFRLexicon, word_lists, batch_size=DEFAULT_LEMMATIZATION_BATCH_SIZE, n_process=1):
+    """
+    Returns lemmas of all the words in word_lists, keyed by word. Lemmas of previously seen words are served
+    from the lemma cache, the rest are lemmatized with nlp.pipe, one doc per word list. n_process > 1 forks
+    spaCy worker processes, so use it only outside celery prefork workers (e.g. backfill scripts), since
+    daemonic processes can't have children.
+    """
+    lemmas_by_word = lexicon.lemma_cache.get_many(word for words in word_lists for word in words)
+    uncached_word_lists = []
+    for words in word_lists:
+        uncached_words = []
+        for word in words:
+            if word not in lemmas_by_word:
+                lemmas_by_word[word] = None
+                uncached_words.append(word)
+        if uncached_words:
+            uncached_word_lists.append(uncached_words)
+
+    docs = lexicon.nlp.pipe(
+        (" ".join(words) for words in uncached_word_lists),
+        batch_size=batch_size,
+        n_process=n_process,
+    )
+    new_lemmas_by_word = {}
+    for words, doc in zip(uncached_word_lists, docs):
+        new_lemmas_by_word.update(get_lemmas_by_word(doc, words))
+    lexicon.lemma_cache.set_many(new_lemmas_by_word)
+    lemmas_by_word.update(new_lemmas_by_word)
+    return lemmas_by_word
+
+
+def get_unknown_word_lemmas(words) -> typing.Dict[str, typing.List[str]]:
+    """Lemmas of the words which aren't in the CEFR lexicon, the ones evaluate_vocab needs to lemmatize."""
+    lexicon = get_lexicon()
+    unknown_words = [word for word in dict.fromkeys(words) if lexicon.get_word_level(word) is None]
+    return lemmatize_words(lexicon, [unknown_words])
+
+
+def evaluate_vocab_batch(texts, batch_size=DEFAULT_LEMMATIZATION_BATCH_SIZE, n_process=1, text_analyses=None):
+    """
+    Same as calling evaluate_vocab on every text, but unknown words of all the texts are lemmatized together
+    (see lemmatize_words). text_analyses, if passed, are the analyse_text outputs of the texts.
+    """
+    lexicon = get_lexicon()
+    if text_analyses is None:
+        text_analyses = [None] * len(texts)
+    analyses = [
+        VocabAnalysis(lexicon, text, text_analysis) for text, text_analysis in zip(texts, text_analyses)
+    ]
+
+    lemmas_by_word = lemmatize_words(
+        lexicon,
+        [
+            [word for word in analysis.words_not_found if word not in analysis.known_lemmas]
+            for analysis in analyses
+        ],
+        batch_size=batch_size,
+        n_process=n_process,
+    )
+
+    for analysis in analyses:
+        lemmatized_words = []
+        for word in analysis.words_not_found:
+            lemmas = analysis.known_lemmas.get(word)
+            if lemmas is None:
+                lemmas = lemmas_by_word[word]
+            lemmatized_words.extend(lemmas)
+        analysis.add_lemmatized_words(lemmatized_words)
+    return [analysis.get_result() for analysis in analyses]
+
+
+def get_lemma_cache_stats():
+    return get_lexicon().lemma_cache.stats()
+
+
+def evaluate_vocab(user_answer, text_analysis=None):
+    return evaluate_vocab_batch([user_answer], text_analyses=[text_analysis])[0]
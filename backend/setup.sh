@@ -167,6 +167,17 @@ fi
 
 echo -e "${GREEN}✓ Prompt templates initialized successfully${NC}"
 
+# Compile the CEFR vocab lexicon used by the Vocab processor
+echo -e "${BLUE}Compiling CEFR vocab lexicon (using local venv)...${NC}"
+python manage.py compile_vocab_lexicon
+
+if [ $? -ne 0 ]; then
+    echo -e "${RED}❌ CEFR vocab lexicon compilation failed!${NC}"
+    exit 1
+fi
+
+echo -e "${GREEN}✓ CEFR vocab lexicon compiled successfully${NC}"
+
 # Seed the database using local venv
 echo -e "${BLUE}Seeding database with sample data (using local venv)...${NC}"
 python manage.py seed_data